@@ -0,0 +1,90 @@
+#! /usr/bin/env python
+# vim: set fileencoding=utf-8
+
+# Python 2 or 3
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""bench_Bloom_filter.py - time Bloom filter membership tests.
+
+Usage: bench_Bloom_filter.py [-n repeats] [word_file]
+
+Look up each word of word_file (default ../util/Brown_words.txt, one word
+per line) in the undercount and overcount filters, with the generic
+BloomFilter.__contains__() (a generator of probes) and with the inline
+BloomFilter2.__contains__(). Check that both agree and report the time per
+lookup.
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+
+import sys
+import os
+import io
+import getopt
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+from readability.Bloom_filter import BloomFilter
+from readability.syllable_count_eng_bf import undercount_bf, overcount_bf
+
+
+def printf(format_str, *args):
+    sys.stdout.write(format_str % args)
+
+
+def best_time(func, repeats):
+    return min(timeit.repeat(func, number=1, repeat=repeats))
+
+
+def bench(label, bf, words, repeats):
+    generic = [BloomFilter.__contains__(bf, w) for w in words]
+    inline = [w in bf for w in words]
+    ok = generic == inline
+    if not ok:
+        printf('%s: results differ!\n', label)
+    t_generic = best_time(
+            lambda: [BloomFilter.__contains__(bf, w) for w in words], repeats)
+    t_inline = best_time(lambda: [w in bf for w in words], repeats)
+    nwords = len(words)
+    printf('%-18s %d probes, %d hits: generator %.3f us  inline %.3f us '
+            'per lookup\n', label, bf.num_probes, sum(inline),
+            1e6 * t_generic / nwords, 1e6 * t_inline / nwords)
+    return ok
+
+
+def usage_exit(msg=''):
+    if msg and not msg.endswith('\n'):
+        msg += '\n'
+    sys.exit('%s%s' % (msg, __doc__))
+
+
+def main():
+    try:
+        (opts, args) = getopt.gnu_getopt(sys.argv[1:], 'hn:')
+    except getopt.GetoptError as e:
+        usage_exit(e.msg)
+    repeats = 5
+    for optflag, optval in opts:
+        if optflag == '-n':
+            repeats = int(optval)
+        else:
+            usage_exit()
+    if len(args) > 1:
+        usage_exit('Too many args.')
+    fn = args[0] if args else os.path.join(HERE, '..', 'util',
+                                            'Brown_words.txt')
+    with io.open(fn, encoding='utf8') as fp:
+        words = [w.lower() for w in fp.read().split()]
+    ok = bench('undercount_filter', undercount_bf, words, repeats)
+    ok = bench('overcount_filter', overcount_bf, words, repeats) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
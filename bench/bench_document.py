@@ -0,0 +1,102 @@
+#! /usr/bin/env python
+# vim: set fileencoding=utf-8
+
+# Python 2 or 3
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""bench_document.py - time re-scoring an edited document.
+
+Usage: bench_document.py [-n edits] [text_file]
+
+Type -n characters (default 200) one at a time into paragraphs spread
+through text_file (default ../texts/1661-8.txt, Latin-1), updating a
+ReadabilityDocument with the whole text after each one. Report the time
+per update against the time to read the whole text again, and check that
+the document's sentences and counts match a full read of the final text.
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+
+import sys
+import os
+import io
+import getopt
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+from readability import Readability, ReadabilityDocument, split_paragraphs
+
+
+def printf(format_str, *args):
+    sys.stdout.write(format_str % args)
+
+
+def full_read(text):
+    rb = Readability()
+    sentences = rb.read(split_paragraphs(text))
+    return sentences, rb.statistics()
+
+
+def usage_exit(msg=''):
+    if msg and not msg.endswith('\n'):
+        msg += '\n'
+    sys.exit('%s%s' % (msg, __doc__))
+
+
+def main():
+    try:
+        (opts, args) = getopt.gnu_getopt(sys.argv[1:], 'hn:')
+    except getopt.GetoptError as e:
+        usage_exit(e.msg)
+    nedits = 200
+    for optflag, optval in opts:
+        if optflag == '-n':
+            nedits = int(optval)
+        else:
+            usage_exit()
+    if len(args) > 1:
+        usage_exit('Too many args.')
+    if args:
+        fn, enc = args[0], 'utf8'
+    else:
+        fn, enc = os.path.join(HERE, '..', 'texts', '1661-8.txt'), 'latin-1'
+    with io.open(fn, encoding=enc) as fp:
+        text = fp.read()
+
+    t = timeit.default_timer()
+    full_read(text)
+    t_full = timeit.default_timer() - t
+    t = timeit.default_timer()
+    doc = ReadabilityDocument(text)
+    t_doc = timeit.default_timer() - t
+
+    # Insert characters at points spread through the text, a few at a time
+    # at each point, as if typing.
+    typed = 'Hello there. '
+    nread = 0
+    t = timeit.default_timer()
+    for k in range(nedits):
+        pos = (k // len(typed) + 1) * len(text) // (nedits // len(typed) + 2)
+        pos += k % len(typed)
+        text = text[:pos] + typed[k % len(typed)] + text[pos:]
+        nread += doc.update(text)
+    t_edit = (timeit.default_timer() - t) / max(nedits, 1)
+
+    printf('%d chars, %d paragraphs\n', len(text), len(doc.paragraphs))
+    printf('full read: %.2f ms  document: %.2f ms  '
+            'update: %.3f ms (%.2f paragraphs read per update)\n',
+            t_full * 1000, t_doc * 1000, t_edit * 1000,
+            nread / max(nedits, 1))
+    sentences, stats = full_read(text)
+    if doc.sentences() != sentences or doc.statistics() != stats:
+        printf('Document does not match full read!\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
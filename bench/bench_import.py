@@ -0,0 +1,103 @@
+#! /usr/bin/env python
+# vim: set fileencoding=utf-8
+
+# Python 2 or 3
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""bench_import.py - time importing readability and first use per language.
+
+Usage: bench_import.py [-n runs] [-b budget_ms]
+
+Each case is run -n times (default 10) in a fresh Python process; the
+median time is reported, less the time for a Python process that does
+nothing. If the time to import readability is over the budget (default
+25 ms) the exit status is 1.
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+
+import sys
+import os
+import getopt
+import subprocess
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, '..', 'src')
+
+CASES = [
+    ('import readability', 'import readability'),
+    ('first use: words only', 'import readability; '
+        'readability.Readability(count_syllables=False).read("Hi there.")'),
+    ('first use: English', 'import readability; '
+        'readability.Readability().read("Hi there.")'),
+    ('first use: English lexicon', 'import readability; '
+        'readability.Readability(lexicon=True).read("Hi there.")'),
+    ('first use: Spanish', 'import readability; '
+        'readability.Readability(language="spa").read("Hola.")'),
+    ]
+
+
+def printf(format_str, *args):
+    sys.stdout.write(format_str % args)
+
+
+def run_time(code, runs):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+            [SRC] + ([env['PYTHONPATH']] if env.get('PYTHONPATH') else []))
+    # Time imports from cached bytecode, as for an installed package.
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    args = [sys.executable, '-c', code]
+    times = []
+    for _ in range(runs):
+        t = timeit.default_timer()
+        subprocess.check_call(args, env=env)
+        times.append(timeit.default_timer() - t)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def usage_exit(msg=''):
+    if msg and not msg.endswith('\n'):
+        msg += '\n'
+    sys.exit('%s%s' % (msg, __doc__))
+
+
+def main():
+    try:
+        (opts, args) = getopt.gnu_getopt(sys.argv[1:], 'hn:b:')
+    except getopt.GetoptError as e:
+        usage_exit(e.msg)
+    runs = 10
+    budget = 25.0
+    for optflag, optval in opts:
+        if optflag == '-n':
+            runs = int(optval)
+        elif optflag == '-b':
+            budget = float(optval)
+        else:
+            usage_exit()
+    if args:
+        usage_exit('No args expected.')
+    # Compile (and cache) the bytecode before timing anything.
+    run_time('import readability', 1)
+    base = run_time('pass', runs)
+    printf('Python startup: %.1f ms\n', base * 1000)
+    results = {}
+    for label, code in CASES:
+        results[label] = (run_time(code, runs) - base) * 1000
+        printf('%-28s %7.1f ms\n', label + ':', results[label])
+    import_ms = results[CASES[0][0]]
+    if import_ms > budget:
+        printf('Import time %.1f ms is over budget of %.1f ms!\n',
+                import_ms, budget)
+        sys.exit(1)
+    printf('Import time is within budget of %.1f ms.\n', budget)
+
+
+if __name__ == '__main__':
+    main()
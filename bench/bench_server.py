@@ -0,0 +1,151 @@
+#! /usr/bin/env python3
+# vim: set fileencoding=utf-8
+
+# Python 3 only (asyncio)
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""bench_server.py - load test the scoring server over loopback.
+
+Usage: bench_server.py [-c clients] [-n requests] [-j workers] [-P]
+                        [-b batch_size] [text_file]
+
+Start readability.server on a free loopback port in this process, and send
+-n requests (default 2000) from -c concurrent clients (default 50), each
+on its own keep-alive connection. Each request is a paragraph of text_file
+(default ../texts/2097.txt), English and Spanish alternately. Check each
+score against Readability read directly, and report the throughput and
+the server's latency histogram. Exit status is 1 if any score is wrong or
+any request failed.
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+
+import sys
+import os
+import io
+import json
+import getopt
+import asyncio
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+from readability import split_paragraphs
+from readability.server import ScoringServer, score_batch
+
+
+def printf(format_str, *args):
+    sys.stdout.write(format_str % args)
+
+
+async def http_request(reader, writer, method, path, body=b'',
+                        content_type='application/json'):
+    writer.write(('%s %s HTTP/1.1\r\nHost: localhost\r\n'
+                    'Content-Type: %s\r\nContent-Length: %d\r\n\r\n'
+                    % (method, path, content_type, len(body))).encode('latin-1')
+                    + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, json.loads((await reader.readexactly(length)).decode('utf-8'))
+
+
+async def client(port, jobs, results):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for k, (text, language) in jobs:
+        body = json.dumps(dict(text=text, language=language)).encode('utf-8')
+        results[k] = await http_request(reader, writer, 'POST', '/score', body)
+    writer.close()
+
+
+async def run(server, texts, nclients):
+    await server.start()
+    jobs = list(enumerate(texts))
+    results = [None] * len(jobs)
+    t = timeit.default_timer()
+    await asyncio.gather(*[client(server.port, jobs[k::nclients], results)
+                            for k in range(nclients)])
+    elapsed = timeit.default_timer() - t
+    reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+    status, metrics = await http_request(reader, writer, 'GET', '/metrics')
+    writer.close()
+    await server.close()
+    return results, elapsed, metrics
+
+
+def usage_exit(msg=''):
+    if msg and not msg.endswith('\n'):
+        msg += '\n'
+    sys.exit('%s%s' % (msg, __doc__))
+
+
+def main():
+    try:
+        (opts, args) = getopt.gnu_getopt(sys.argv[1:], 'hc:n:j:Pb:')
+    except getopt.GetoptError as e:
+        usage_exit(e.msg)
+    nclients, nrequests = 50, 2000
+    params = dict(port=0)
+    for optflag, optval in opts:
+        if optflag == '-c':
+            nclients = int(optval)
+        elif optflag == '-n':
+            nrequests = int(optval)
+        elif optflag == '-j':
+            params['workers'] = int(optval)
+        elif optflag == '-P':
+            params['processes'] = True
+        elif optflag == '-b':
+            params['batch_size'] = int(optval)
+        else:
+            usage_exit()
+    if len(args) > 1:
+        usage_exit('Too many args.')
+    fn = args[0] if args else os.path.join(HERE, '..', 'texts', '2097.txt')
+    with io.open(fn, encoding='utf8') as fp:
+        paragraphs = [p for p in split_paragraphs(fp.read()) if p.strip()]
+    texts = [(paragraphs[k % len(paragraphs)], ('eng', 'spa')[k & 1])
+                for k in range(nrequests)]
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    results, elapsed, metrics = loop.run_until_complete(
+            run(ScoringServer(**params), texts, nclients))
+    loop.close()
+
+    expected = score_batch([(text, language, False)
+                            for text, language in texts])
+    bad = 0
+    for (status, result), counts in zip(results, expected):
+        if status != 200 or (result['nsentences'], result['nwords'],
+                result['nsyllables'], result['hard_words']) != counts:
+            bad += 1
+    printf('%d requests from %d clients in %.2f s: %.0f requests/s, '
+            '%.0f words/s\n', nrequests, nclients, elapsed,
+            nrequests / elapsed, sum(c[1] for c in expected) / elapsed)
+    printf('%d batches (%.1f requests per batch)\n', metrics['batches'],
+            nrequests / max(metrics['batches'], 1))
+    latency = metrics['latency']
+    printf('latency: mean %.2f ms\n', 1000 * latency['sum'] /
+            max(latency['count'], 1))
+    for bound, n in latency['buckets']:
+        if n:
+            printf('  <= %-6s s: %d\n', bound, n)
+    if bad:
+        printf('%d requests failed or scored wrong!\n', bad)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,409 @@
+#! /usr/bin/env python
+# vim: set fileencoding=utf-8
+
+# Python 2 or 3
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""bench_suite.py - throughput, memory, and import time benchmarks.
+
+Usage: bench_suite.py [-n repeats] [-o results.json] [-c baseline.json]
+                        [-t tolerance] [benchmark ...]
+
+Run the benchmarks named (default all) over the texts in ../texts and the
+words in ../util/Brown_words.txt, and report words/sec, sentences/sec,
+seconds, and peak RSS (resident memory) for each. Each benchmark runs in
+its own Python process, timed best of -n runs (default 3), so the peak
+RSS is its own. The syllable caches are cleared before each run.
+
+    -o results.json     save the results as a JSON baseline
+    -c baseline.json    compare with a saved baseline; exit status is 1 if
+                          any benchmark is more than -t percent (default
+                          10) slower than in the baseline
+
+Benchmarks:
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+
+import sys
+import os
+import io
+import json
+import getopt
+import platform
+import subprocess
+import timeit
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..')
+SRC = os.path.join(ROOT, 'src')
+sys.path.insert(0, SRC)
+
+TEXTS = [('2097.txt', 'ascii'), ('244-0.txt', 'utf-8-sig'),
+            ('1661-8.txt', 'latin-1'), ('10947-8.txt', 'latin-1')]
+WORDS_FN = os.path.join(ROOT, 'util', 'Brown_words.txt')
+
+
+def printf(format_str, *args):
+    sys.stdout.write(format_str % args)
+
+
+def best_time(func, repeats, setup=None):
+    """Return the best time of repeats calls of func, and its last result."""
+    best = None
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        t = timeit.default_timer()
+        result = func()
+        t = timeit.default_timer() - t
+        if best is None or t < best:
+            best = t
+    return best, result
+
+
+def read_texts():
+    """Return a list of the texts, each as a list of paragraphs."""
+    from readability import split_paragraphs
+    texts = []
+    for fn, enc in TEXTS:
+        with io.open(os.path.join(ROOT, 'texts', fn), encoding=enc) as fp:
+            texts.append(split_paragraphs(fp.read()))
+    return texts
+
+
+def read_words():
+    with io.open(WORDS_FN, encoding='utf8') as fp:
+        return fp.read().split()
+
+
+def clear_caches():
+    import readability
+    for language in ('eng', 'eng_lex', 'spa'):
+        readability.get_syllable_cache(language).cache_clear()
+
+
+def bench_word_counter(module_name, func_name):
+    def bench(repeats):
+        import importlib
+        func = getattr(importlib.import_module(module_name), func_name)
+        words = read_words()
+        seconds, _ = best_time(lambda: [func(w) for w in words], repeats)
+        return dict(seconds=seconds, words=len(words))
+    bench.__doc__ = '%s() on each of the Brown words' % func_name
+    return bench
+
+
+def bench_sentence_breaker(repeats):
+    """Readability.sentence_breaker() on each paragraph of the texts"""
+    import readability
+    texts = read_texts()
+    rb = readability.Readability()
+
+    def run():
+        nsentences = nwords = 0
+        for text_list in texts:
+            for text in text_list:
+                sentences = rb.sentence_breaker(text)
+                nsentences += len(sentences)
+                nwords += sum(len(s) for s in sentences) // 2
+        return nsentences, nwords
+    seconds, (nsentences, nwords) = best_time(run, repeats)
+    return dict(seconds=seconds, words=nwords, sentences=nsentences)
+
+
+def bench_sentence_ends(repeats):
+    """sentence_ends() of each paragraph of the texts, pre-split"""
+    from readability.readability import words_re, sentence_ends
+    tokens_list = [words_re.split(text)
+                   for text_list in read_texts() for text in text_list]
+
+    def run():
+        return sum(len(sentence_ends(tokens)) for tokens in tokens_list)
+    seconds, nsentences = best_time(run, repeats)
+    return dict(seconds=seconds,
+                words=sum(len(tokens) // 2 for tokens in tokens_list),
+                sentences=nsentences)
+
+
+def bench_read_with(**options):
+    def bench(repeats):
+        import readability
+        texts = read_texts()
+
+        def run():
+            nsentences = nwords = 0
+            for text_list in texts:
+                rb = readability.Readability(**options)
+                rb.read(text_list)
+                nsentences += rb.nsentences
+                nwords += rb.nwords
+            return nsentences, nwords
+        seconds, (nsentences, nwords) = best_time(run, repeats, clear_caches)
+        return dict(seconds=seconds, words=nwords, sentences=nsentences)
+    bench.__doc__ = 'Readability(%s).read() of each text' % ', '.join(
+            '%s=%r' % item for item in sorted(options.items()))
+    return bench
+
+
+def bench_read_tokens(repeats):
+    """Readability(get_sentences=False).read_tokens() of pre-split texts"""
+    import readability
+    from readability.readability import words_re
+    texts = [[words_re.split(text) for text in text_list]
+                for text_list in read_texts()]
+
+    def run():
+        nsentences = nwords = 0
+        for token_lists in texts:
+            rb = readability.Readability(get_sentences=False)
+            for tokens in token_lists:
+                rb.read_tokens(tokens)
+            nsentences += rb.nsentences
+            nwords += rb.nwords
+        return nsentences, nwords
+    seconds, (nsentences, nwords) = best_time(run, repeats, clear_caches)
+    return dict(seconds=seconds, words=nwords, sentences=nsentences)
+
+
+def bench_read_result_cache(repeats):
+    """Readability(get_sentences=False).read() of each text, cached counts"""
+    import readability
+    texts = read_texts()
+    cache = readability.ResultCache()
+
+    def run():
+        nsentences = nwords = 0
+        for text_list in texts:
+            rb = readability.Readability(get_sentences=False,
+                                         result_cache=cache)
+            rb.read(text_list)
+            nsentences += rb.nsentences
+            nwords += rb.nwords
+        return nsentences, nwords
+    run()
+    seconds, (nsentences, nwords) = best_time(run, repeats)
+    return dict(seconds=seconds, words=nwords, sentences=nsentences)
+
+
+def bench_word_counts(repeats):
+    """read() of each text counting words and separators, then buckets()"""
+    import collections
+    import readability
+    texts = read_texts()
+
+    def run():
+        dwords = readability.WordCounts()
+        dseparators = collections.Counter()
+        nsentences = nwords = 0
+        for text_list in texts:
+            rb = readability.Readability(get_sentences=False, dwords=dwords,
+                                         dseparators=dseparators)
+            rb.read(text_list)
+            nsentences += rb.nsentences
+            nwords += rb.nwords
+        dwords.buckets()
+        return nsentences, nwords
+    seconds, (nsentences, nwords) = best_time(run, repeats, clear_caches)
+    return dict(seconds=seconds, words=nwords, sentences=nsentences)
+
+
+def python_env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+            [SRC] + ([env['PYTHONPATH']] if env.get('PYTHONPATH') else []))
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+
+def bench_rdblty(repeats):
+    """demo/rdblty.py run on each text, end to end"""
+    import readability
+    env = python_env()
+    rdblty = os.path.join(ROOT, 'demo', 'rdblty.py')
+    devnull = open(os.devnull, 'w')
+
+    def run():
+        for fn, enc in TEXTS:
+            subprocess.check_call([sys.executable, rdblty, '-e', enc,
+                    os.path.join(ROOT, 'texts', fn)], env=env, stdout=devnull)
+    seconds, _ = best_time(run, repeats)
+    devnull.close()
+    nsentences = nwords = 0
+    for text_list in read_texts():
+        rb = readability.Readability(get_sentences=False)
+        rb.read(text_list)
+        nsentences += rb.nsentences
+        nwords += rb.nwords
+    return dict(seconds=seconds, words=nwords, sentences=nsentences)
+
+
+def bench_import(repeats):
+    """import readability, less Python startup (median of 2 * repeats)"""
+    env = python_env()
+
+    def median_time(code):
+        times = []
+        for _ in range(2 * repeats):
+            t = timeit.default_timer()
+            subprocess.check_call([sys.executable, '-c', code], env=env)
+            times.append(timeit.default_timer() - t)
+        times.sort()
+        return times[len(times) // 2]
+    median_time('import readability')   # Write the bytecode first.
+    return dict(seconds=median_time('import readability') -
+                        median_time('pass'))
+
+
+BENCHMARKS = [
+    ('syllable_count_eng', bench_word_counter(
+            'readability.syllable_count_eng', 'syllable_count_eng')),
+    ('syllable_count_eng_bf', bench_word_counter(
+            'readability.syllable_count_eng_bf', 'syllable_count_eng_bf')),
+    ('syllable_count_eng_lex', bench_word_counter(
+            'readability.syllable_lexicon', 'syllable_count_eng_lex')),
+    ('syllable_count_spa', bench_word_counter(
+            'readability.syllable_count_spa', 'syllable_count_spa')),
+    ('sentence_breaker', bench_sentence_breaker),
+    ('sentence_ends', bench_sentence_ends),
+    ('read', bench_read_with()),
+    ('read_counts', bench_read_with(get_sentences=False)),
+    ('read_tokens', bench_read_tokens),
+    ('read_result_cache', bench_read_result_cache),
+    ('word_counts', bench_word_counts),
+    ('read_uncached', bench_read_with(get_sentences=False,
+                                        cache_syllables=False)),
+    ('rdblty', bench_rdblty),
+    ('import', bench_import),
+    ]
+benchmarks = dict(BENCHMARKS)
+__doc__ += ''.join('    %-24s%s\n' % (name, func.__doc__)
+                    for name, func in BENCHMARKS)
+
+
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:     # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss //= 1024        # bytes, not KB
+    return rss
+
+
+def run_child(name, repeats):
+    """Run one benchmark in this process and write its results as JSON."""
+    result = benchmarks[name](repeats)
+    seconds = result['seconds']
+    for key in ('words', 'sentences'):
+        if key in result:
+            result[key + '_per_sec'] = result[key] / seconds
+    result['peak_rss_kb'] = peak_rss_kb()
+    sys.stdout.write(json.dumps(result))
+
+
+def run_benchmark(name, repeats):
+    out = subprocess.check_output([sys.executable, os.path.abspath(__file__),
+                    '--child', name, '-n', str(repeats)], env=python_env())
+    return json.loads(out.decode('utf-8'))
+
+
+def git_commit():
+    try:
+        out = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                        cwd=ROOT, stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.decode('ascii').strip()
+
+
+def rate(result):
+    """Return the figure compared between runs: the words/sec, if any."""
+    if 'words_per_sec' in result:
+        return result['words_per_sec']
+    return 1.0 / result['seconds']
+
+
+def print_result(name, result, baseline):
+    def fmt(key, format_str):
+        return format_str % result[key] if result.get(key) is not None else ''
+    line = '%-24s%12s%12s%10s%10s' % (name,
+            fmt('words_per_sec', '%.0f'), fmt('sentences_per_sec', '%.0f'),
+            fmt('seconds', '%.3f'), fmt('peak_rss_kb', '%d'))
+    if baseline is not None:
+        line += '%+9.1f%%' % (100.0 * (rate(result) / rate(baseline) - 1))
+    printf('%s\n', line.rstrip())
+
+
+def usage_exit(msg=''):
+    if msg and not msg.endswith('\n'):
+        msg += '\n'
+    sys.exit('%s%s' % (msg, __doc__))
+
+
+def main():
+    try:
+        (opts, args) = getopt.gnu_getopt(sys.argv[1:], 'hn:o:c:t:',
+                                            ['child='])
+    except getopt.GetoptError as e:
+        usage_exit(e.msg)
+    repeats = 3
+    child = out_fn = compare_fn = None
+    tolerance = 10.0
+    for optflag, optval in opts:
+        if optflag == '-n':
+            repeats = int(optval)
+        elif optflag == '-o':
+            out_fn = optval
+        elif optflag == '-c':
+            compare_fn = optval
+        elif optflag == '-t':
+            tolerance = float(optval)
+        elif optflag == '--child':
+            child = optval
+        else:
+            usage_exit()
+    if child is not None:
+        run_child(child, repeats)
+        return
+    for name in args:
+        if name not in benchmarks:
+            usage_exit('Unknown benchmark: %s' % name)
+    names = args or [name for name, func in BENCHMARKS]
+    baseline = {}
+    if compare_fn:
+        with io.open(compare_fn, encoding='utf8') as fp:
+            baseline = json.load(fp)['results']
+        printf('Compared with %s\n', compare_fn)
+
+    printf('%-24s%12s%12s%10s%10s%s\n', 'benchmark', 'words/s',
+            'sentences/s', 'seconds', 'RSS KB', '  change' if baseline else '')
+    results = {}
+    slower = []
+    for name in names:
+        results[name] = run_benchmark(name, repeats)
+        print_result(name, results[name], baseline.get(name))
+        if name in baseline and (rate(results[name]) <
+                rate(baseline[name]) * (1 - tolerance / 100.0)):
+            slower.append(name)
+
+    if out_fn:
+        meta = dict(commit=git_commit(), python=platform.python_version(),
+                    platform=platform.platform(), repeats=repeats,
+                    date=time.strftime('%Y-%m-%d %H:%M:%S'))
+        with io.open(out_fn, 'w', encoding='utf8') as fp:
+            fp.write(json.dumps(dict(meta=meta, results=results), indent=2,
+                                sort_keys=True, ensure_ascii=True) + '\n')
+    if slower:
+        printf('More than %g%% slower than baseline: %s\n', tolerance,
+                ' '.join(slower))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#! /usr/bin/env python
+# vim: set fileencoding=utf-8
+
+# Python 2 or 3
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""bench_syllable_count_eng.py - time the English syllable counter.
+
+Usage: bench_syllable_count_eng.py [-n repeats] [word_files...]
+
+Check that syllable_count_eng() (compiled rule table) agrees with
+syllable_count_eng_rules() (one regex search per rule) on every word, then
+report the time per word for each. Word files are JSON dicts keyed by word
+(as made by make_cmudict_syllables.py) or plain text, one word per line.
+Default is ../util/cmudict_dev.json and ../util/Brown_words.txt.
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+
+import sys
+import os
+import io
+import json
+import getopt
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+from readability.syllable_count_eng import (syllable_count_eng,
+                                            syllable_count_eng_rules)
+
+
+def printf(format_str, *args):
+    sys.stdout.write(format_str % args)
+
+
+def load_words(fn):
+    with io.open(fn, encoding='utf8') as fp:
+        if fn.endswith('.json'):
+            return sorted(json.load(fp))
+        return fp.read().split()
+
+
+def time_per_word(func, words, repeats):
+    def run():
+        for word in words:
+            func(word)
+    return min(timeit.repeat(run, number=1, repeat=repeats)) / len(words)
+
+
+def bench(fn, repeats):
+    words = load_words(fn)
+    diffs = [w for w in words
+                if syllable_count_eng(w) != syllable_count_eng_rules(w)]
+    if diffs:
+        printf('%s: %d words counted differently, e.g.: %s\n',
+                fn, len(diffs), ' '.join(diffs[:10]))
+    t_rules = time_per_word(syllable_count_eng_rules, words, repeats)
+    t_fused = time_per_word(syllable_count_eng, words, repeats)
+    printf('%-24s %7d words  rules: %6.2f us/word  compiled: %6.2f us/word'
+            '  speedup: %.2fx\n', os.path.basename(fn), len(words),
+            t_rules * 1e6, t_fused * 1e6, t_rules / t_fused)
+    return not diffs
+
+
+def usage_exit(msg=''):
+    if msg and not msg.endswith('\n'):
+        msg += '\n'
+    sys.exit('%s%s' % (msg, __doc__))
+
+
+def main():
+    try:
+        (opts, args) = getopt.gnu_getopt(sys.argv[1:], 'hn:')
+    except getopt.GetoptError as e:
+        usage_exit(e.msg)
+    repeats = 5
+    for optflag, optval in opts:
+        if optflag == '-n':
+            repeats = int(optval)
+        else:
+            usage_exit()
+    if not args:
+        args = [os.path.join(HERE, '..', 'util', 'cmudict_dev.json'),
+                os.path.join(HERE, '..', 'util', 'Brown_words.txt')]
+    ok = True
+    for fn in args:
+        ok = bench(fn, repeats) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
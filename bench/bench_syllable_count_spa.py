@@ -0,0 +1,100 @@
+#! /usr/bin/env python
+# vim: set fileencoding=utf-8
+
+# Python 2 or 3
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""bench_syllable_count_spa.py - time the Spanish syllable counter.
+
+Usage: bench_syllable_count_spa.py [-n repeats] [word_files...]
+
+Check that syllable_count_spa() (translate table) agrees with
+syllable_count_spa_split() (regex split on consonants) on every word, then
+report the time per word for each, and for syllable_count_spa() behind the
+shared syllable cache. Word files are plain text, split on whitespace.
+Default is ../doc/source/Spanish.rst and ../util/Brown_words.txt.
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+
+import sys
+import os
+import io
+import getopt
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+from readability import get_syllable_cache
+from readability.syllable_count_spa import (syllable_count_spa,
+                                            syllable_count_spa_split)
+
+
+def printf(format_str, *args):
+    sys.stdout.write(format_str % args)
+
+
+def load_words(fn):
+    with io.open(fn, encoding='utf8') as fp:
+        return fp.read().split()
+
+
+def time_per_word(func, words, repeats):
+    def run():
+        for word in words:
+            func(word)
+    return min(timeit.repeat(run, number=1, repeat=repeats)) / len(words)
+
+
+def bench(fn, repeats):
+    words = load_words(fn)
+    diffs = [w for w in words
+                if syllable_count_spa(w) != syllable_count_spa_split(w)]
+    if diffs:
+        printf('%s: %d words counted differently, e.g.: %s\n',
+                fn, len(diffs), ' '.join(diffs[:10]))
+    cache = get_syllable_cache('spa')
+    t_split = time_per_word(syllable_count_spa_split, words, repeats)
+    t_table = time_per_word(syllable_count_spa, words, repeats)
+    cache.cache_clear()
+    t_cached = time_per_word(cache, words, repeats)
+    printf('%-24s %7d words  split: %6.2f us/word  table: %6.2f us/word'
+            '  cached: %6.2f us/word  speedup: %.2fx\n',
+            os.path.basename(fn), len(words), t_split * 1e6, t_table * 1e6,
+            t_cached * 1e6, t_split / t_table)
+    return not diffs
+
+
+def usage_exit(msg=''):
+    if msg and not msg.endswith('\n'):
+        msg += '\n'
+    sys.exit('%s%s' % (msg, __doc__))
+
+
+def main():
+    try:
+        (opts, args) = getopt.gnu_getopt(sys.argv[1:], 'hn:')
+    except getopt.GetoptError as e:
+        usage_exit(e.msg)
+    repeats = 5
+    for optflag, optval in opts:
+        if optflag == '-n':
+            repeats = int(optval)
+        else:
+            usage_exit()
+    if not args:
+        args = [os.path.join(HERE, '..', 'doc', 'source', 'Spanish.rst'),
+                os.path.join(HERE, '..', 'util', 'Brown_words.txt')]
+    ok = True
+    for fn in args:
+        ok = bench(fn, repeats) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#! /usr/bin/env python
+# vim: set fileencoding=utf-8
+
+# Python 2 or 3
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""smoke.py - run the readability package once each way, under each Python.
+
+Usage: smoke.py [python ...]
+
+Each case is run in a fresh process of each Python interpreter named
+(default this one), e.g. "smoke.py python2.7 python3", so a failure under
+Python 2 shows up even when developing under Python 3. The exit status is
+1 if any case fails.
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+
+import sys
+import os
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, '..', 'src')
+TEXT = os.path.join(HERE, '..', 'texts', '2097.txt')
+RDBLTY = os.path.join(HERE, '..', 'demo', 'rdblty.py')
+
+CASES = [
+    ('Readability().read()', 'import readability; '
+        'r = readability.Readability(); '
+        'assert len(r.read(u"The cat sat. It ran! Did it? Yes.")) == 4; '
+        'assert r.nsentences == 4'),
+    ('read() counts only', 'import readability; '
+        'r = readability.Readability(get_sentences=False); '
+        'r.read([u"The cat sat. It ran!", u"Did it? Yes."]); '
+        'assert r.stats() == (4, 8, 8)'),
+    ('ReadabilityStats', 'import readability; '
+        'S = readability.ReadabilityStats; a = S(2, 10, 14, 1); '
+        'b = S.from_bytes((a - S(1, 4, 5, 1)).to_bytes())\n'
+        'assert b == S(1, 6, 9, 0)\n'
+        'try: a - S(3, 1, 1, 1)\n'
+        'except ValueError: pass\n'
+        'else: raise AssertionError("negative counts")\n'
+        'assert a == S(2, 10, 14, 1)\n'
+        'try: S(-1).to_bytes()\n'
+        'except ValueError: pass\n'
+        'else: raise AssertionError("negative counts")\n'),
+    ('Spanish', 'import readability; '
+        'r = readability.Readability(language="spa"); '
+        'r.read(u"Hola. Que tal?"); assert r.nsentences == 2'),
+    ('SyllableCache threads', 'import sys, random, threading\n'
+        'from readability.syllable_cache import SyllableCache\n'
+        'if hasattr(sys, "setswitchinterval"): sys.setswitchinterval(1e-6)\n'
+        'else: sys.setcheckinterval(1)\n'
+        'cache = SyllableCache(len, maxsize=4)\n'
+        'errors = []\n'
+        'def run(seed):\n'
+        '    rnd = random.Random(seed)\n'
+        '    try:\n'
+        '        for _ in range(50000):\n'
+        '            word = "w%d" % rnd.randrange(6)\n'
+        '            assert cache(word) == len(word)\n'
+        '    except Exception as e:\n'
+        '        errors.append(e)\n'
+        'threads = [threading.Thread(target=run, args=(k,)) '
+        'for k in range(4)]\n'
+        'for t in threads: t.start()\n'
+        'for t in threads: t.join()\n'
+        'assert not errors, errors[:1]\n'
+        'assert cache.cache_info().currsize == 4\n'),
+    ('read_stream()', 'import io, readability; '
+        'r = readability.Readability(); '
+        'fp = io.open(%r, encoding="utf-8", newline=""); '
+        's = list(r.read_stream(fp, 4096)); '
+        'assert s == readability.Readability().read(io.open(%r, '
+        'encoding="utf-8", newline="").read())' % (TEXT, TEXT)),
+    ('empty input', 'import io, os, tempfile, readability; '
+        'r = readability.Readability; '
+        'fd, fn = tempfile.mkstemp(); os.close(fd); '
+        'assert r().read(u"") == [[u""]]; '
+        'assert list(r().read_stream([])) == [[u""]]; '
+        'assert list(r().read_stream(io.StringIO())) == [[u""]]; '
+        'assert r().read_file(fn) == [[u""]]; os.remove(fn)'),
+    ('file_lines() of bz2', 'import os, io, bz2, tempfile, readability; '
+        'data = io.open(%r, "rb").read(); '
+        'fd, fn = tempfile.mkstemp(); os.close(fd); '
+        'fp = bz2.BZ2File(fn, "w"); fp.write(data); fp.close(); '
+        'fp = bz2.BZ2File(fn); lines = list(readability.file_lines(fp)); '
+        'fp.close(); os.remove(fn); '
+        'assert lines == data.decode("utf-8").splitlines()' % TEXT),
+    ('read_file()', 'import io, readability; '
+        'r = readability.Readability(); '
+        'assert r.read_file(%r) == readability.Readability().read(io.open(%r, '
+        'encoding="utf-8", newline="").read())' % (TEXT, TEXT)),
+    ('rdblty.py', 'import sys, runpy; sys.argv = ["rdblty.py", %r]; '
+        'runpy.run_path(%r, run_name="__main__")' % (TEXT, RDBLTY)),
+    ('rdblty.py -j 2 tarball', 'import os, sys, runpy, tarfile, tempfile; '
+        'fd, fn = tempfile.mkstemp(".tgz"); os.close(fd); '
+        'tf = tarfile.open(fn, "w:gz"); tf.add(%r, "a.txt"); '
+        'tf.add(%r, "b.txt"); tf.close(); '
+        'sys.argv = ["rdblty.py", "-j", "2", "-s", fn]; '
+        'runpy.run_path(%r, run_name="__main__"); os.remove(fn)'
+        % (TEXT, TEXT, RDBLTY)),
+    ('rdblty.py -m', 'import sys, runpy; '
+        'sys.argv = ["rdblty.py", "-m", %r]; '
+        'runpy.run_path(%r, run_name="__main__")' % (TEXT, RDBLTY)),
+    ]
+
+
+def run_case(python, code):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+            [SRC] + [p for p in [env.get('PYTHONPATH')] if p])
+    proc = subprocess.Popen([python, '-c', code], env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = proc.communicate()[0]
+    return proc.returncode, output.decode('utf-8', 'replace')
+
+
+def main():
+    pythons = sys.argv[1:] or [sys.executable]
+    failures = 0
+    for python in pythons:
+        for name, code in CASES:
+            status, output = run_case(python, code)
+            print('%-24s %-24s %s' % (python, name,
+                                      'ok' if status == 0 else 'FAILED'))
+            if status != 0:
+                failures += 1
+                sys.stdout.write(output)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
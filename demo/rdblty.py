@@ -5,10 +5,16 @@
 
 """rdblty.py
 
-  Usage: rdblty.py -h -s -e encoding -n --sentences -w --syllables format files...
+  Usage: rdblty.py -h -s -a lexicon -e encoding -j jobs -m -n --sentences -w --syllables format files...
   Where
       -h, --help            This usage screen
+      -a  lexicon           use an abbreviation lexicon: a domain (legal,
+                              medical) or a file of abbreviations, one
+                              per line; may be repeated
       -e  encoding          input file encoding (default UTF-8)
+      -j  jobs              number of worker processes (default 1;
+                              0 means one per CPU)
+      -m, --mmap            memory-map plain (uncompressed) text files
       -S, --Spanish         assume input files are Spanish
       -w, --words           dump words
       -s, --sentences       display sentences
@@ -16,6 +22,11 @@
       --syllables format    format for syllable count (implies -n)
                               default is "%s{%d}"
 
+Files may be plain text, compressed with gzip (.gz), bzip2 (.bz2), or xz
+(.xz), or zip or tar archives (.zip, .tar, .tar.gz, .tgz, .tar.bz2,
+.tar.xz) of text files. Each file is decoded and read a paragraph at a
+time.
+
 This is a demo program for the Readability module.
 """
 
@@ -28,11 +39,23 @@ from __future__ import division, print_function, unicode_literals
 
 import sys
 import os
+import io
 import getopt
 import glob
 import zipfile
+import tarfile
+import gzip
+import bz2
+import collections
+import multiprocessing
+
+try:
+    import lzma
+except ImportError:     # Python 2
+    lzma = None
 
 import readability
+from readability.word_counts import report_order
 
 
 def printf(fmt, *args):
@@ -41,45 +64,15 @@ def printf(fmt, *args):
 
 def report_words(dwords):
     printf('====WORDS:==== %d\n', len(dwords))
-    end_dot = []
-    for s in end_dot:
-        ss = s[:-1]
-        dwords[ss] = dwords.get(ss, 0) + dwords[s]
-        del dwords[s]
-
-    def rep_del(label, testt):
-        '''Report a class of keys in dwords and delete them.'''
-        def test(s):
-            try:
-                return testt(s)
-            except IndexError:
-                sys.stderr.write('wtf? %r\n' % s)
-                raise
-        dd = [(key, val) for key, val in dwords.items() if test(key)]
-        for key, val in dd:
-            del dwords[key]
-        dd.sort(key=lambda t: (-t[1], t[0].lower(), t[0]))
+    buckets = dwords.buckets()
+    for label in readability.WORD_CLASSES:
+        dd = sorted(buckets[label], key=report_order)
         printf('====( %s )==== %d\n', label, len(dd))
         for wd, k in dd:
             # TEMP! FIXME this assert should work
             assert ' ' not in wd
             printf('%6d %s\n', k, wd)
 
-    rep_del('lower', lambda s: s.isalpha() and s.islower())
-    rep_del('upper', lambda s: s.isalpha() and s.isupper())
-    rep_del('cap', lambda s: s.isalpha() and len(s) > 1
-            and s[0].isupper() and s[1:].islower())
-    rep_del('apostrophed', lambda s: "'" in s and s.replace("'", '', 1).isalpha())
-    # rep_del('hyphenated', lambda s: '-' in s and s.replace('-', '', 2).isalpha())
-    rep_del('hyphenated', lambda s: '-' in s and s.replace('-', '').isalpha())
-    rep_del('alpha', lambda s: s.isalpha())
-    rep_del('number', lambda s: s.isdigit())
-    rep_del('number+', lambda s: s[0].isdigit() or
-            (s[0] == '.' and s[1:2].isdigit()))
-    rep_del('URL', lambda s: s.startswith('http:') or s.startswith('https:'))
-    rep_del('ends_dot', lambda s: s[-1] == '.')
-    rep_del('leftovers', lambda s: True)
-
 
 def report_separators(dseparators):
     printf('====( NONWORDS )==== %d\n', len(dseparators))
@@ -92,33 +85,54 @@ def report_separators(dseparators):
 
 
 def get_text_list(optns, fp):
-    v, text_list = [], []
-    for s in fp.read().decode(optns.enc).splitlines():
+    """Generate the paragraphs of binary file fp.
+
+    The file is decoded as it is read, so only about one paragraph is in
+    memory at a time. The lines are those of str.splitlines().
+    """
+    return paragraphs(readability.file_lines(fp, optns.enc))
+
+
+def get_mapped_text_list(optns, fn):
+    """Generate the paragraphs of file fn, as get_text_list() does.
+
+    The file is memory-mapped and decoded a window at a time.
+    """
+    return paragraphs(readability.mapped_lines(fn, optns.enc))
+
+
+def paragraphs(lines):
+    v = []
+    for s in lines:
         v.append(s)
         # Break into chunks (probable paragraph breaks) on empty lines.
         if not s.strip():
-            text_list.append(' '.join(v))
+            yield ' '.join(v)
             v = []
-    text_list.append(' '.join(v))
-    return text_list
+    yield ' '.join(v)
 
 
-def do_file(optns, fp, fn, dwords, dseparators, stats):
-    text_list = get_text_list(optns, fp)
-    rb = readability.Readability(get_sentences=optns.get_sentences,
+def do_file(optns, text_list, fn, dwords, dseparators):
+    # Unless syllable counts are shown in them, get the sentences as
+    # offsets into the texts rather than as lists of tokens.
+    use_offsets = optns.get_sentences and not optns.show_syllable_counts
+    rb = readability.Readability(get_sentences=not use_offsets and
+                                                optns.get_sentences,
                             show_syllable_counts=optns.show_syllable_counts,
                             dwords=dwords, dseparators=dseparators,
-                            language=optns.language)
+                            language=optns.language,
+                            abbreviations=optns.abbreviations)
     basefn = os.path.basename(fn)
-    if optns.get_sentences and not optns.show_syllable_counts:
-        # For later sanity check.
-        text_list_copy = text_list[:]
-    sentences = rb.read(text_list)
+    # The texts and sentences are only kept if they are to be displayed.
+    texts, offsets_list, sentences = [], [], []
+    for text in text_list:
+        if use_offsets:
+            texts.append(text)
+            offsets_list.append(rb.read_offsets(text))
+        else:
+            sentences.extend(rb.read(text))
     if optns.get_FK:
         nsentences, nwords, nsyllables = rb.stats()
-        stats.tot_level += rb.FK_grade()
-        stats.tot_words += nwords
-        stats.tot_level_words += nwords * rb.FK_grade()
         if optns.language == 'eng':
             printf('%-24.24s:%7d:%6.1f:%6.1f  '
                     '%9.1f  %5.1f (%4d sentences; %6d syllables)\n',
@@ -132,19 +146,40 @@ def do_file(optns, fp, fn, dwords, dseparators, stats):
                     nsyllables)
         else:
             printf('!! We only process English and Spanish!\n')
-    if optns.get_sentences:
+    if use_offsets:
+        printf('File: %s\n', basefn)
+        for text, offsets in zip(texts, offsets_list):
+            # Sanity check: the sentences should cover the original text.
+            assert offsets[0] == 0 and offsets[-1] == len(text)
+            for k in range(0, len(offsets), 2):
+                if offsets[k] < offsets[k+1]:
+                    printf('%s\n', text[offsets[k]:offsets[k+1]])
+                assert k == 0 or offsets[k] == offsets[k-1]
+    elif optns.get_sentences:
         printf('File: %s\n', basefn)
-        alls = []
         for j, sentence in enumerate(sentences):
-            if not optns.show_syllable_counts:
-                alls.extend(sentence)
             if ''.join(sentence):
                 # Use this for sentence numbering:
                 # printf('%3d %s\n', j+1, ''.join(sentence))
                 printf('%s\n', ''.join(sentence))
-        # Sanity check: if not showing syllable counts, then sentences
-        # returned from readability should match original text.
-        assert optns.show_syllable_counts or ''.join(text_list_copy) == ''.join(alls)
+    return rb.statistics()
+
+
+def add_file_stats(optns, stats, file_stats):
+    if optns.get_FK:
+        stats.tot_level += file_stats.FK_grade()
+        stats.tot_words += file_stats.nwords
+        stats.tot_level_words += file_stats.nwords * file_stats.FK_grade()
+    stats.num_files += 1
+
+
+def new_stats():
+    stats = type(str('stats'), (), {})()
+    stats.tot_level = 0
+    stats.tot_words = 0
+    stats.tot_level_words = 0
+    stats.num_files = 0
+    return stats
 
 
 def do_zip(optns, zfn, dwords, dseparators, stats):
@@ -152,34 +187,175 @@ def do_zip(optns, zfn, dwords, dseparators, stats):
         for fn in zf.namelist():
             if not fn.endswith('/'):
                 with zf.open(fn) as fp:
-                    do_file(optns, fp, fn, dwords, dseparators, stats)
-                    stats.num_files += 1
+                    file_stats = do_file(optns, get_text_list(optns, fp), fn,
+                                            dwords, dseparators)
+                    add_file_stats(optns, stats, file_stats)
                     sys.stderr.write('%6d\r' % stats.num_files)
 
 
+def do_tar(optns, tfn, dwords, dseparators, stats):
+    # The members are read in order, so a compressed archive is only
+    # decompressed once.
+    with tarfile.open(tfn) as tf:
+        for member in tf:
+            if member.isfile():
+                fp = tf.extractfile(member)
+                file_stats = do_file(optns, get_text_list(optns, fp),
+                                        member.name, dwords, dseparators)
+                add_file_stats(optns, stats, file_stats)
+                sys.stderr.write('%6d\r' % stats.num_files)
+
+
+def is_zip(fn):
+    return fn.endswith('.zip') or fn.endswith('.zip.exe')
+
+
+def is_tar(fn):
+    return fn.endswith(('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2',
+                        '.tar.xz', '.txz'))
+
+
+def do_plain_file(optns, fn, dwords, dseparators):
+    if optns.mmap and not is_compressed(fn):
+        return do_file(optns, get_mapped_text_list(optns, fn), fn, dwords,
+                        dseparators)
+    # We read binary because do_file() also has to handle zipped
+    # elements, which always read as binary.
+    with open_file(fn) as fp:
+        return do_file(optns, get_text_list(optns, fp), fn, dwords,
+                        dseparators)
+
+
+def is_compressed(fn):
+    return fn.endswith(('.gz', '.bz2', '.xz'))
+
+
+def open_file(fn):
+    """Open fn for reading in binary, decompressing it if need be."""
+    if fn.endswith('.gz'):
+        return gzip.open(fn, 'rb')
+    if fn.endswith('.bz2'):
+        return bz2.BZ2File(fn, 'rb')
+    if fn.endswith('.xz'):
+        if lzma is None:
+            usage_exit('Cannot read %s: no lzma module.' % fn)
+        return lzma.open(fn, 'rb')
+    return open(fn, 'rb')
+
+
+# Parallel mode: each file or archive member is a task, run in a pool of worker
+# processes. A worker returns the output of do_file(), its word and
+# separator counts, and its ReadabilityStats; the main process merges them
+# in task order, so the output is the same as
+# in serial mode.
+
+worker_optns = None
+worker_zip_files = {}
+worker_tar_files = {}
+
+
+def init_worker(optns_dict):
+    global worker_optns
+    worker_optns = type(str('optns'), (), {})()
+    vars(worker_optns).update(optns_dict)
+    load_lexicons(worker_optns)
+
+
+def load_lexicons(optns):
+    # A lexicon file is added as a domain named by its path.
+    for name in optns.abbreviations:
+        if os.path.isfile(name):
+            readability.add_lexicon(name, *readability.read_lexicon(name),
+                                    language=optns.language)
+
+
+def do_task(task):
+    kind, fn, member = task
+    optns = worker_optns
+    dwords = readability.WordCounts() if optns.words else None
+    dseparators = collections.Counter() if optns.words else None
+    out = io.StringIO()
+    save_stdout, sys.stdout = sys.stdout, out
+    try:
+        if kind == 'zip':
+            if fn not in worker_zip_files:
+                worker_zip_files[fn] = zipfile.ZipFile(fn)
+            with worker_zip_files[fn].open(member) as fp:
+                file_stats = do_file(optns, get_text_list(optns, fp), member,
+                                        dwords, dseparators)
+        elif kind == 'tar':
+            if fn not in worker_tar_files:
+                worker_tar_files[fn] = tarfile.open(fn)
+            # Python 2's tarfile members are not context managers.
+            fp = worker_tar_files[fn].extractfile(member)
+            file_stats = do_file(optns, get_text_list(optns, fp), member,
+                                    dwords, dseparators)
+        else:
+            file_stats = do_plain_file(optns, fn, dwords, dseparators)
+    finally:
+        sys.stdout = save_stdout
+    return out.getvalue(), dwords, dseparators, file_stats
+
+
+def do_files_parallel(optns, fns, dwords, dseparators, stats):
+    tasks = []
+    for fn in fns:
+        if is_zip(fn):
+            with zipfile.ZipFile(fn) as zf:
+                tasks.extend(('zip', fn, member) for member in zf.namelist()
+                                if not member.endswith('/'))
+        elif is_tar(fn):
+            with tarfile.open(fn) as tf:
+                tasks.extend(('tar', fn, member.name) for member in tf
+                                if member.isfile())
+        else:
+            tasks.append(('file', fn, None))
+    chunksize = max(1, len(tasks) // (optns.jobs * 16))
+    pool = multiprocessing.Pool(optns.jobs, init_worker, (vars(optns),))
+    try:
+        results = pool.imap(do_task, tasks, chunksize)
+        for k, (out, task_dwords, task_dseparators, file_stats) in enumerate(
+                results):
+            sys.stdout.write(out)
+            if optns.words:
+                dwords.update(task_dwords)
+                dseparators.update(task_dseparators)
+            add_file_stats(optns, stats, file_stats)
+            if tasks[k][0] != 'file':
+                sys.stderr.write('%6d\r' % stats.num_files)
+    finally:
+        pool.close()
+        pool.join()
+
+
 def do_files(optns, fns):
+    # Check this before any worker starts: a worker cannot exit the program.
+    if lzma is None:
+        for fn in fns:
+            if fn.endswith(('.xz', '.txz')):
+                usage_exit('Cannot read %s: no lzma module.' % fn)
+
     printf('%d files.\n', len(fns))
-    stats = type(str('stats'), (), {})()
-    stats.tot_level = 0
-    stats.tot_words = 0
-    stats.tot_level_words = 0
-    stats.num_files = 0
+    stats = new_stats()
     if optns.language == 'eng':
         print('File:                      Words: Level:  Ease        Fog   Smog')
     else:
         print('File:                      Words:  Ease:  Corr  IFSZx IFSZscale:')
 
-    dwords = {}
-    dseparators = {}
-    for fn in fns:
-        if fn.endswith('.zip') or fn.endswith('.zip.exe'):
-            do_zip(optns, fn, dwords, dseparators, stats)
-        else:
-            with open(fn, 'rb') as fp:
-                # We read binary because do_file() also has to handle zipped
-                # elements, which always read as binary.
-                do_file(optns, fp, fn, dwords, dseparators, stats)
-                stats.num_files += 1
+    dwords = readability.WordCounts()
+    dseparators = collections.Counter()
+    if optns.jobs > 1:
+        sys.stdout.flush()
+        do_files_parallel(optns, fns, dwords, dseparators, stats)
+    else:
+        for fn in fns:
+            if is_zip(fn):
+                do_zip(optns, fn, dwords, dseparators, stats)
+            elif is_tar(fn):
+                do_tar(optns, fn, dwords, dseparators, stats)
+            else:
+                file_stats = do_plain_file(optns, fn, dwords, dseparators)
+                add_file_stats(optns, stats, file_stats)
 
     if stats.num_files == 0:
         usage_exit('NO FILES?')
@@ -207,8 +383,9 @@ def main():
     if len(args) == 0:
         usage_exit('No args given.')
     try:
-        (opts, args) = getopt.gnu_getopt(args, 'he:Swsn',
-                ['help', 'Spanish', 'words', 'sentences', 'syllables='])
+        (opts, args) = getopt.gnu_getopt(args, 'ha:e:j:mSwsn',
+                ['help', 'mmap', 'Spanish', 'words', 'sentences',
+                 'syllables='])
     except getopt.GetoptError as e:
         usage_exit(e.msg)
     optns = type(str('optns'), (), {})()
@@ -218,11 +395,27 @@ def main():
     optns.get_sentences = False
     optns.show_syllable_counts = False
     optns.get_FK = True
+    optns.jobs = 1
+    optns.mmap = False
+    optns.abbreviations = []
     for optflag, optval in opts:
         if optflag == '-h' or optflag == '--help':
             usage_exit()
+        elif optflag == '-a':
+            optns.abbreviations.append(optval)
         elif optflag == '-e':
             optns.enc = optval
+        elif optflag == '-j':
+            try:
+                optns.jobs = int(optval)
+            except ValueError:
+                optns.jobs = -1
+            if optns.jobs < 0:
+                usage_exit('-j needs a number of jobs.')
+            if optns.jobs == 0:
+                optns.jobs = multiprocessing.cpu_count()
+        elif optflag == '-m' or optflag == '--mmap':
+            optns.mmap = True
         elif optflag == '-S':
             optns.language = 'spa'
         elif optflag == '-w' or optflag == '--words':
@@ -239,7 +432,14 @@ def main():
     fns = []
     for fn in args:
         fns += glob.glob(fn)
+    try:
+        load_lexicons(optns)
+        readability.get_abbreviation_index(optns.language,
+                                           optns.abbreviations)
+    except (IOError, ValueError) as e:
+        usage_exit(str(e))
     do_files(optns, fns)
 
 
-main()
+if __name__ == '__main__':
+    main()
@@ -103,6 +103,7 @@ if __name__ == '__main__':
         long_description=LONG,
         packages=PACKAGES,
         package_dir={'': 'src'},
+        package_data={'readability': ['*.dat', '*.bf']},
         zip_safe=False,
         classifiers=CLASSIFIERS,
         #install_requires=INSTALL_REQUIRES,
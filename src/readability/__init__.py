@@ -6,7 +6,15 @@
 ## Copyright © 2018 Raymond D. Gardner
 ## Licensed under the MIT License
 
-from .readability import Readability
+from .readability import (Readability, ReadabilityStats, ReadabilityProfile,
+                          get_syllable_cache, syllable_counts,
+                          tokens_from_offsets)
+from .document import ReadabilityDocument, split_paragraphs
+from .word_counts import WordCounts, WORD_CLASSES
+from .result_cache import ResultCache, SQLiteResultCache
+from .mapped_file import mapped_text, mapped_lines, file_lines
+from .abbreviations import (AbbreviationIndex, add_lexicon, read_lexicon,
+                            get_abbreviation_index)
 
 # This approach to setup params modelled on Hynek Schlawack's attrs package.
 
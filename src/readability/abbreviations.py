@@ -0,0 +1,220 @@
+#! /usr/bin/env python
+# vim: set fileencoding=utf-8
+
+# Python 2 or 3
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""abbreviations.py -- decide if the word before a dot is an abbreviation.
+
+sentence_ends() asks this for each dot followed by space and an uppercase
+letter or digit: if the word before the dot is an abbreviation, the dot
+does not end the sentence. An AbbreviationIndex holds the abbreviations
+known to it as frozen sets, and remembers its answer for each word it has
+been asked about, so after the first time a word costs a dict lookup.
+
+Lexicons of more abbreviations can be added for a language and a domain
+(for example legal or medical text) with add_lexicon(), or read from a
+file with read_lexicon(); get_abbreviation_index(language, domains)
+returns the index for the lexicons of those domains.
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+import re
+import io
+
+
+# The abbreviation detection here is adapted from the first approach in
+# grefenstette94 (see readability.py). They use regex to match: a single
+# letter followed by dot; a sequence of letter, dot, letter-or-digit, dot,
+# ...; or an uppercase letter followed by one or more consonants followed by
+# dot. The first case is subsumed by the second, so our regex needs only two
+# alternatives.
+
+# Abbreviations matching the regex are considered to be not and end of sentence
+# (EOS) if followed by an uppercase. I'm not sure that grefenstette94 considers
+# if the follower is uppercase. But they then enumerate the abbreviations in
+# the Brown Corpus that do not match the regex. I find that their list is
+# incomplete, and I handle numbers differently from them, so I have a somewhat
+# different list of abbreviations which, if followed by an uppercase, will not
+# be considered EOS. Also, I only accept a month abbreviation if followed by a
+# digit.
+
+abbr_re = re.compile(r'''(
+[A-Za-z](\.[A-Za-z0-9])*$
+|
+[A-Z][bcdfghj-np-tvwxz]+$
+)
+''', re.VERBOSE)
+
+# From Grefenstette 94. Not the copy cited above. Maybe a later version?
+# "The abbreviations in Brown that do not match the above regular expressions
+# are the following:"
+# etc Fig No Co (Month-Names) Sen Gen Rev Gov (U.S.-State-Abbreviations) fig
+# Rep Ave Corp figs Figs 24-hr lbs Capt yrs dia Stat Ref Prof Atty 6-hr sec
+# eqn chap Messrs Dist Dept ex-Mrs Vol Tech Supt Rte Reps Prop Mmes 8-oz
+# viz var seq prop pro-U.N.F.P nos mos min mil mEq ex-Gov eqns dept Yok
+# USN Ter Shak Sha Sens SS Ry Rul Presbyterian-St P.-T.A Msec McN Maj
+# Lond Jas Grev Gre Cir Cal Brig Aubr 42-degrees-F 400-lb 400-kc 36-in 3-hp
+# 3-by-6-ft 29-Oct 27-in 25-ft 24-in 160-ml 15,500-lb 12-oz 100-million-lb 10-yr
+# 1.0-mg 0.5-mv./m 0.1-mv./m 0.080-in 0.025-in
+
+# These are mostly from Brown Corpus, NLTK version, redacted by me (rdg):
+known_abbrs = frozenset({
+    'etc', 'Fig', 'No', 'Co', 'Sen', 'Gen', 'Rev', 'Gov', 'lb', 'Sec', 'vs',
+    'fig', 'Rep', 'Ave', 'cm', 'Corp', 'mg', 'mm', 'Figs', 'gm', 'ft',
+    'figs', 'Col', 'cf', 'lbs', 'Capt', 'cu', 'Atty', 'Prof', 'pp', 'sq',
+    'dia', 'cc', 'yrs', 'Hon', 'Stat', 'Ref', 'hr', 'Dist', 'Messrs',
+    'Dept', 'sec', 'eqn', 'Reps', 'Supt', 'dept', 'Rte', 'oz', 'Vol', 'ca',
+    'kc', 'hp', 'Prop', 'Mmes', 'Brig', 'USN', 'Cir', 'Bros', 'msec', 'viz',
+    'var', 'seq', 'prop', 'nos', 'ml', 'eqns', 'yd', 'Spec', 'Maj',
+    'Sr', 'Sra', 'Srta',    # Some Spanish forms of address.
+    })
+
+
+month_abbrs = frozenset({'Jan', 'Feb', 'Mar', 'Apr', 'Jun', 'Jul', 'Aug',
+                         'Sep', 'Sept', 'Oct', 'Nov', 'Dec'})
+
+
+# A few words match abbr_re but are not often abbreviations.
+non_abbrs = frozenset({'Act', 'Arts', 'End', 'Inn'})
+
+
+# The words remembered by an index are forgotten when there are this many.
+MEMO_MAXSIZE = 100000
+
+
+class AbbreviationIndex(object):
+    """The abbreviations known_abbrs, those matching abbr_re, and more.
+
+    abbreviations are words (without the dot) to take as abbreviations,
+    and non_abbreviations are words not to, even if known_abbrs has them or
+    they match abbr_re. Month abbreviations are only taken as abbreviations
+    before a digit.
+    """
+
+    def __init__(self, abbreviations=(), non_abbreviations=()):
+        abbreviations = frozenset(abbreviations)
+        non_abbreviations = frozenset(non_abbreviations)
+        self.non_abbrs = (non_abbrs - abbreviations) | non_abbreviations
+        self.known_abbrs = (known_abbrs | abbreviations) - self.non_abbrs
+        self.added = abbreviations - known_abbrs
+        self.removed = non_abbreviations - non_abbrs
+        self.memo = {}
+
+    def is_abbreviation(self, word, nx):
+        """Return true if word, followed by a dot and then nx, is an
+        abbreviation.
+        """
+        abbr = self.memo.get(word)
+        if abbr is None:
+            abbr = self.classify(word)
+        return abbr or (word in month_abbrs and nx[:1].isdigit())
+
+    def classify(self, word):
+        memo = self.memo
+        if len(memo) >= MEMO_MAXSIZE:
+            memo.clear()
+        abbr = memo[word] = (word not in self.non_abbrs and
+                             (word in self.known_abbrs or
+                              abbr_re.match(word) is not None))
+        return abbr
+
+    def __contains__(self, word):
+        abbr = self.memo.get(word)
+        if abbr is None:
+            abbr = self.classify(word)
+        return abbr
+
+    def signature(self):
+        """Return a string that differs for indexes that differ, and is
+        empty for the default index.
+        """
+        return ' '.join(['+' + word for word in sorted(self.added)] +
+                        ['-' + word for word in sorted(self.removed)])
+
+
+# Lexicons added for (language, domain); a domain of None applies to all
+# the indexes for the language.
+lexicons = {}
+
+# Indexes made by get_abbreviation_index(), by (language, domains).
+indexes = {}
+
+default_index = AbbreviationIndex()
+
+is_abbreviation = default_index.is_abbreviation
+
+
+def add_lexicon(domain, abbreviations, non_abbreviations=(), language='eng'):
+    """Add abbreviations and non_abbreviations for language and domain.
+
+    If domain is None, they are used for all text in the language.
+    """
+    abbrs, non = lexicons.get((language, domain), (frozenset(), frozenset()))
+    lexicons[language, domain] = (abbrs | frozenset(abbreviations),
+                                  non | frozenset(non_abbreviations))
+    for key in [key for key in indexes if key[0] == language]:
+        del indexes[key]
+
+
+def read_lexicon(path, encoding='utf-8'):
+    """Return (abbreviations, non_abbreviations) read from file path.
+
+    The file has a word on each line; a dot at the end of a word is
+    ignored. A word beginning with '!' is a non-abbreviation. Empty lines
+    and lines beginning with '#' are skipped.
+    """
+    abbreviations, non_abbreviations = set(), set()
+    with io.open(path, encoding=encoding) as fp:
+        for line in fp:
+            word = line.strip().rstrip('.')
+            if not word or word.startswith('#'):
+                continue
+            if word.startswith('!'):
+                non_abbreviations.add(word[1:])
+            else:
+                abbreviations.add(word)
+    return abbreviations, non_abbreviations
+
+
+def get_abbreviation_index(language='eng', domains=()):
+    """Return the AbbreviationIndex for the lexicons of language and domains."""
+    if isinstance(domains, (type(''), type(b''))):
+        domains = (domains,)
+    key = (language, tuple(domains))
+    index = indexes.get(key)
+    if index is None:
+        abbreviations, non_abbreviations = set(), set()
+        for domain in (None,) + key[1]:
+            if (language, domain) not in lexicons:
+                if domain is None:
+                    continue
+                raise ValueError('No %r abbreviation lexicon for language %r'
+                                 % (domain, language))
+            abbrs, non = lexicons[language, domain]
+            abbreviations |= abbrs
+            non_abbreviations |= non
+        if abbreviations or non_abbreviations:
+            index = AbbreviationIndex(abbreviations, non_abbreviations)
+        else:
+            index = default_index
+        indexes[key] = index
+    return index
+
+
+# Words that end sentences by default (they are not in known_abbrs and do not
+# match abbr_re), but are usually abbreviations in legal or medical text.
+
+add_lexicon('legal', {
+    'Amend', 'Arts', 'Ass\'n', 'Cas', 'Civ', 'Comm', 'Const', 'Crim', 'Evid',
+    'Fed', 'Jur', 'Para', 'Paras', 'Proc', 'Pub', 'Reg', 'Regs', 'Sess',
+    'Stats', 'Supp', 'Super',
+    })
+
+add_lexicon('medical', {
+    'approx', 'inj', 'kg', 'mcg', 'mEq', 'mmol', 'pt', 'pts', 'soln', 'susp',
+    'tabs', 'wk', 'wks',
+    })
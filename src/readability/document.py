@@ -0,0 +1,367 @@
+#! /usr/bin/env python
+# vim: set fileencoding=utf-8
+
+# Python 2 or 3
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""document.py -- readability of a document that is edited and re-scored.
+
+A ReadabilityDocument keeps the sentences and counts of each paragraph of
+a text. When it is given the edited text, it re-reads only the paragraphs
+that changed, and updates the document totals by taking away the counts
+of the old paragraphs and adding those of the new ones.
+
+Paragraphs are split on empty lines, as demo/rdblty.py does, and each is
+read separately (a sentence never spans paragraphs), so the results are
+the same as Readability.read() of the whole list of paragraphs. Finding
+the changed part takes a quick comparison of the old and new texts; only
+the changed paragraphs are tokenized and counted.
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+from collections import namedtuple
+from itertools import chain
+
+from .readability import Readability, ReadabilityMeasures, ReadabilityStats
+
+
+# text: the paragraph as given to Readability.read()
+# size: the length of the raw text it was made from, with line ends
+# sentences: its sentences (empty list unless get_sentences is set)
+# stats: its ReadabilityStats
+Paragraph = namedtuple('Paragraph', 'text size sentences stats')
+
+# Texts are compared in pieces of this size, doubling after each piece
+# that matches, to find where they differ.
+COMPARE_CHUNK_SIZE = 4096
+
+# Paragraphs are kept in blocks of this many, up to twice this many.
+BLOCK_SIZE = 64
+
+
+def paragraph_spans(text):
+    """Return a list of (paragraph, size) for the paragraphs of text.
+
+    Paragraphs end at empty lines. The lines of each paragraph are joined
+    with spaces, and the empty line that ends it is kept at its end, as in
+    get_text_list() in rdblty.py. size is the length of the paragraph in
+    text, with line ends. The last paragraph is whatever follows the last
+    empty line, and may be ('', 0).
+    """
+    spans, v, size = [], [], 0
+    for s, line in zip(text.splitlines(), text.splitlines(True)):
+        v.append(s)
+        size += len(line)
+        if not s.strip():
+            spans.append((' '.join(v), size))
+            v, size = [], 0
+    spans.append((' '.join(v), size))
+    return spans
+
+
+def split_paragraphs(text):
+    """Split text into a list of paragraphs at empty lines.
+
+    The result is the same as get_text_list() in rdblty.py makes.
+    """
+    return [paragraph for paragraph, size in paragraph_spans(text)]
+
+
+def common_prefix_len(a, b):
+    """Return the length of the longest common prefix of a and b."""
+    n = min(len(a), len(b))
+    lo = 0
+    size = COMPARE_CHUNK_SIZE
+    while lo < n:
+        hi = min(lo + size, n)
+        if a[lo:hi] != b[lo:hi]:
+            break
+        lo = hi
+        size *= 2
+    else:
+        return n
+    # a[:lo] == b[:lo] but a[:hi] != b[:hi]
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def common_suffix_len(a, b, limit):
+    """Return the length of the longest common suffix of a and b, up to limit."""
+    la, lb = len(a), len(b)
+    lo = 0
+    size = COMPARE_CHUNK_SIZE
+    while lo < limit:
+        hi = min(lo + size, limit)
+        if a[la-hi:la-lo] != b[lb-hi:lb-lo]:
+            break
+        lo = hi
+        size *= 2
+    else:
+        return limit
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[la-mid:la-lo] == b[lb-mid:lb-lo]:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+class FenwickTree(object):
+    """Prefix sums of a list of numbers, each of which may be changed.
+
+    Changing a number, finding the sum of the first i numbers, and finding
+    where the sums pass a value each take O(log n) time.
+    """
+
+    def __init__(self, values):
+        tree = [0]
+        tree.extend(values)
+        n = len(tree) - 1
+        for i in range(1, n + 1):
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self.tree = tree
+
+    def add(self, i, delta):
+        """Add delta to number i (from 0)."""
+        tree = self.tree
+        i += 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, i):
+        """Return the sum of the first i numbers."""
+        tree = self.tree
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, value):
+        """Return (i, prefix_sum(i)) for the largest i with prefix_sum(i) <= value.
+
+        The numbers must not be negative. If value is negative, i is 0.
+        """
+        tree = self.tree
+        n = len(tree) - 1
+        i = total = 0
+        step = 1
+        while step * 2 <= n:
+            step *= 2
+        while step:
+            j = i + step
+            if j <= n and total + tree[j] <= value:
+                i = j
+                total += tree[j]
+            step //= 2
+        return i, total
+
+
+class ParagraphList(object):
+    """A list of Paragraphs, with the offset of each in the text.
+
+    The paragraphs are kept in blocks, with Fenwick trees of the number of
+    paragraphs and of their sizes in each block, so finding a paragraph by
+    index or by offset, and replacing a few paragraphs, take time about
+    proportional to the size of a block and the log of the number of
+    blocks, not to the number of paragraphs.
+    """
+
+    def __init__(self, paragraphs=()):
+        paragraphs = list(paragraphs)
+        self.blocks = [paragraphs[k:k + BLOCK_SIZE]
+                       for k in range(0, len(paragraphs), BLOCK_SIZE)]
+        self.reindex()
+
+    def reindex(self):
+        self.counts = FenwickTree(len(block) for block in self.blocks)
+        self.sizes = FenwickTree(sum(par.size for par in block)
+                                 for block in self.blocks)
+        self.length = sum(len(block) for block in self.blocks)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return chain.from_iterable(self.blocks)
+
+    def locate(self, i):
+        """Return (block number, index in block) of paragraph i."""
+        if not 0 <= i < self.length:
+            raise IndexError('paragraph index out of range')
+        b, before = self.counts.find(i)
+        return b, i - before
+
+    def __getitem__(self, i):
+        b, k = self.locate(i)
+        return self.blocks[b][k]
+
+    def start(self, i):
+        """Return the offset in the text of paragraph i."""
+        b, k = self.locate(i)
+        return (self.sizes.prefix_sum(b) +
+                sum(par.size for par in self.blocks[b][:k]))
+
+    def index_at(self, offset):
+        """Return the index of the paragraph that holds text[offset].
+
+        That is the last paragraph starting at or before offset, or 0.
+        """
+        b, pos = self.sizes.find(offset)
+        if b == len(self.blocks):
+            b -= 1
+            pos -= sum(par.size for par in self.blocks[b])
+        found = 0
+        for k, par in enumerate(self.blocks[b]):
+            if pos > offset:
+                break
+            found = k
+            pos += par.size
+        return self.counts.prefix_sum(b) + found
+
+    def replace(self, first, end, paragraphs):
+        """Replace paragraphs first to end - 1 with paragraphs; return the old."""
+        bf, kf = self.locate(first)
+        bl, kl = self.locate(end - 1)
+        blocks = self.blocks[bf:bl + 1]
+        merged = list(chain.from_iterable(blocks))
+        kl += len(merged) - len(blocks[-1])
+        old = merged[kf:kl + 1]
+        merged[kf:kl + 1] = paragraphs
+        if len(merged) > 2 * BLOCK_SIZE:
+            new_blocks = [merged[k:k + BLOCK_SIZE]
+                          for k in range(0, len(merged), BLOCK_SIZE)]
+        elif merged:
+            new_blocks = [merged]
+        else:
+            new_blocks = []
+        self.blocks[bf:bl + 1] = new_blocks
+        if len(new_blocks) == 1 == len(blocks):
+            self.counts.add(bf, len(paragraphs) - len(old))
+            self.sizes.add(bf, sum(par.size for par in paragraphs) -
+                               sum(par.size for par in old))
+            self.length += len(paragraphs) - len(old)
+        else:
+            # Blocks were split, joined, or emptied: rare, since a block
+            # only splits after growing by BLOCK_SIZE paragraphs.
+            self.reindex()
+        return old
+
+
+class ReadabilityDocument(ReadabilityMeasures):
+    """Sentences and counts of a document, updated as it is edited.
+
+    Options are as for Readability, except that dwords and dseparators are
+    not supported. Call update() with the whole text each time it changes;
+    all the readability formulas can be computed at any time.
+    """
+
+    def __init__(self, text='', get_sentences=True,
+                        count_syllables=True,
+                        show_syllable_counts=False,
+                        language='eng',
+                        cache_syllables=True,
+                        lexicon=False,
+                        abbreviations=()):
+        self.options = dict(get_sentences=get_sentences,
+                            count_syllables=count_syllables,
+                            show_syllable_counts=show_syllable_counts,
+                            language=language,
+                            cache_syllables=cache_syllables,
+                            lexicon=lexicon,
+                            abbreviations=abbreviations)
+        self.language = language
+        self.text = ''
+        self.paragraphs = ParagraphList([self.read_paragraph('', 0)])
+        self.totals = ReadabilityStats()
+        self.update(text)
+
+    @property
+    def nsentences(self):
+        return self.totals.nsentences
+
+    @property
+    def nwords(self):
+        return self.totals.nwords
+
+    @property
+    def nsyllables(self):
+        return self.totals.nsyllables
+
+    @property
+    def hard_words(self):
+        return self.totals.hard_words
+
+    def read_paragraph(self, text, size):
+        """Return a Paragraph for text."""
+        rb = Readability(**self.options)
+        sentences = rb.read(text)
+        return Paragraph(text, size, sentences, rb.statistics())
+
+    def update(self, text):
+        """Make text the document's text; return the number of paragraphs read.
+
+        Only the paragraphs around the part of the text that changed are
+        split and read again; the others are kept.
+        """
+        if not isinstance(text, unicode if str is bytes else str):
+            raise TypeError('Expected Unicode string; got %s' % type(text))
+        old_text = self.text
+        if text == old_text:
+            return 0
+        prefix = common_prefix_len(old_text, text)
+        suffix = common_suffix_len(old_text, text,
+                                    min(len(old_text), len(text)) - prefix)
+        paragraphs = self.paragraphs
+        # Start at the paragraph holding the character before the change, in
+        # case the change joins a line end to the one before it ('\r' '\n').
+        first = paragraphs.index_at(prefix - 1)
+        region_start = paragraphs.start(first)
+        # End with the paragraph holding the first unchanged character after
+        # the change, so the text after the change starts a paragraph.
+        last = paragraphs.index_at(len(old_text) - suffix)
+        region_end = paragraphs.start(last) + paragraphs[last].size
+        delta = len(text) - len(old_text)
+        while True:
+            spans = paragraph_spans(text[region_start:region_end + delta])
+            if last == len(paragraphs) - 1:
+                break
+            if spans[-1][1] == 0:
+                # The region ends at the end of a paragraph.
+                del spans[-1]
+                break
+            # The region's last paragraph now runs on into the next one.
+            last += 1
+            region_end += paragraphs[last].size
+        replacements = [self.read_paragraph(par, size) for par, size in spans]
+        for paragraph in paragraphs.replace(first, last + 1, replacements):
+            self.totals.subtract(paragraph.stats)
+        for paragraph in replacements:
+            self.totals.merge(paragraph.stats)
+        self.text = text
+        return len(replacements)
+
+    def text_list(self):
+        """Return the list of paragraph texts."""
+        return [paragraph.text for paragraph in self.paragraphs]
+
+    def sentences(self):
+        """Return a list of all the sentences, as Readability.read() does."""
+        return [sentence for paragraph in self.paragraphs
+                    for sentence in paragraph.sentences]
+
+    def statistics(self):
+        """Return the document's counts as a ReadabilityStats object."""
+        return ReadabilityStats(*self.totals.counts())
@@ -0,0 +1,152 @@
+#! /usr/bin/env python
+# vim: set fileencoding=utf-8
+
+# Python 2 or 3
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""mapped_file.py -- decode a large text file a window at a time.
+
+mapped_text() memory-maps a file and generates its text in windows of
+about window_size bytes, so neither the whole file as bytes nor the whole
+decoded text is ever in memory; the mapped pages are shared with the OS
+page cache and can be dropped by it. Readability.read_file() reads a file
+this way, and mapped_lines() generates the lines of a file for programs
+(like demo/rdblty.py) that work a line at a time. file_lines() does the same
+for a binary file object that cannot be mapped, such as a member of an
+archive, with an incremental decoder; it needs only read(), so it works on
+the file objects of Python 2 too.
+
+For UTF-8 and ASCII, each window ends just after a newline where there is
+one, or else at a character boundary, and is decoded straight from the
+mapping; other encodings go through an incremental decoder. (Python 2 cannot
+make a memoryview of a mapping, so there each window is decoded from a copy
+sliced from it.)
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+import os
+import codecs
+import mmap
+
+
+MAP_WINDOW_SIZE = 64 * 1024
+
+# Encodings whose windows are cut at newlines and decoded directly.
+direct_encodings = ('utf-8', 'utf-8-sig', 'ascii')
+
+
+def mapped_text(path, encoding='utf-8', window_size=MAP_WINDOW_SIZE):
+    """Generate the text of file path, decoded a window at a time."""
+    encoding = codecs.lookup(encoding).name
+    with open(path, 'rb') as fp:
+        if not os.fstat(fp.fileno()).st_size:
+            return
+        mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    view = mm if str is bytes else memoryview(mm)
+    try:
+        if encoding in direct_encodings:
+            windows = direct_windows(mm, view, encoding, window_size)
+        else:
+            windows = decoded_windows(view, encoding, window_size)
+        for text in windows:
+            if text:
+                yield text
+    finally:
+        if view is not mm:
+            view.release()
+        mm.close()
+
+
+def direct_windows(mm, view, encoding, window_size):
+    size = len(mm)
+    pos = 0
+    if encoding == 'utf-8-sig':
+        if mm[:3] == codecs.BOM_UTF8:
+            pos = 3
+        encoding = 'utf-8'
+    while pos < size:
+        end = min(pos + window_size, size)
+        if end < size:
+            nl = mm.rfind(b'\n', pos, end)
+            if nl >= 0:
+                end = nl + 1
+            elif encoding == 'utf-8':
+                # Back up to the start of a character, or go on to the end
+                # of the first one if the window is shorter than that.
+                while end > pos and is_continuation(mm, end):
+                    end -= 1
+                if end == pos:
+                    end += 1
+                    while end < size and is_continuation(mm, end):
+                        end += 1
+        yield decode(view, pos, end, codecs.decode, encoding)
+        pos = end
+
+
+def is_continuation(mm, pos):
+    """Return true if byte pos of mm is a UTF-8 continuation byte."""
+    return (ord(mm[pos:pos+1]) & 0xc0) == 0x80
+
+
+def decode(view, start, end, decoder, *args):
+    if not isinstance(view, memoryview):
+        return decoder(view[start:end], *args)
+    # The slice is released at once, even if decoding fails, so the
+    # mapping can be closed.
+    with view[start:end] as chunk:
+        return decoder(chunk, *args)
+
+
+def decoded_windows(view, encoding, window_size):
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for pos in range(0, len(view), window_size):
+        yield decode(view, pos, pos + window_size, decoder.decode)
+    yield decoder.decode(b'', True)
+
+
+def mapped_lines(path, encoding='utf-8', window_size=MAP_WINDOW_SIZE):
+    """Generate the lines of file path, as str.splitlines() would split them."""
+    return text_lines(mapped_text(path, encoding, window_size))
+
+
+def file_lines(fp, encoding='utf-8', read_size=MAP_WINDOW_SIZE):
+    """Generate the lines of binary file fp, as mapped_lines() does."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+
+    def texts():
+        while True:
+            data = fp.read(read_size)
+            if not data:
+                break
+            yield decoder.decode(data)
+        yield decoder.decode(b'', True)
+    return text_lines(texts())
+
+
+def text_lines(texts):
+    """Generate the lines of the text in pieces texts, as str.splitlines()
+    would split the whole text.
+    """
+    carry = ''
+    for text in texts:
+        if not text:
+            continue
+        if carry:
+            text = carry + text
+        lines = text.splitlines()
+        # Hold back a last line that has not ended, or that ends in a
+        # return that may be followed by a newline in the next window.
+        last = text[-1]
+        if last == '\r':
+            carry = lines.pop() + last
+        elif len((last + 'x').splitlines()) == 1:
+            carry = lines.pop()
+        else:
+            carry = ''
+        for line in lines:
+            yield line
+    for line in carry.splitlines():
+        yield line
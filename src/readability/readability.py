@@ -26,11 +26,18 @@ from __future__ import division, print_function, unicode_literals
 
 import re
 import math
+import operator
+from array import array
+import struct
+import timeit
+import importlib
 
 
-# from syllable_count_eng import syllable_count_eng
-from .syllable_count_eng_bf import syllable_count_eng_bf as syllable_count_eng
-from .syllable_count_spa import syllable_count_spa
+from .syllable_cache import SyllableCache, unique_words, broadcast_counts
+from .word_counts import count_into
+from .mapped_file import mapped_text, MAP_WINDOW_SIZE
+from .abbreviations import (AbbreviationIndex, get_abbreviation_index,
+                            is_abbreviation)
 
 
 # Regex to accept "words" including URLs and numbers.
@@ -80,6 +87,10 @@ spaces_re = re.compile(r'(\s+)')
 sentence_end_chars = '!?'
 maybe_sentence_end_chars = sentence_end_chars + '.'
 enders_re = re.compile(r'[%s]+$' % maybe_sentence_end_chars)
+first_char = operator.itemgetter(0)
+
+# Size of pieces read_stream() reads from a file.
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 # Sentence boundary detection is a somewhat tricky problem, not entirely solved.
@@ -93,121 +104,53 @@ enders_re = re.compile(r'[%s]+$' % maybe_sentence_end_chars)
 # The trickiest aspect may be deciding when a dot is a period after an
 # abbreviation vs. a full stop at the end of a sentence, or if it is both.
 
-# The abbreviation detection here is adapted from the first approach in
-# grefenstette94. They use regex to match: a single letter followed by dot; a
-# sequence of letter, dot, letter-or-digit, dot, ...; or an uppercase letter
-# followed by one or more consonants followed by dot. The first case is
-# subsumed by the second, so our regex needs only two alternatives.
-
-# Abbreviations matching the regex are considered to be not and end of sentence
-# (EOS) if followed by an uppercase. I'm not sure that grefenstette94 considers
-# if the follower is uppercase. But they then enumerate the abbreviations in
-# the Brown Corpus that do not match the regex. I find that their list is
-# incomplete, and I handle numbers differently from them, so I have a somewhat
-# different list of abbreviations which, if followed by an uppercase, will not
-# be considered EOS. Also, I only accept a month abbreviation if followed by a
-# digit.
-
-abbr_re = re.compile(r'''(
-[A-Za-z](\.[A-Za-z0-9])*$
-|
-[A-Z][bcdfghj-np-tvwxz]+$
-)
-''', re.VERBOSE)
-
-# From Grefenstette 94. Not the copy cited above. Maybe a later version?
-# "The abbreviations in Brown that do not match the above regular expressions
-# are the following:"
-# etc Fig No Co (Month-Names) Sen Gen Rev Gov (U.S.-State-Abbreviations) fig
-# Rep Ave Corp figs Figs 24-hr lbs Capt yrs dia Stat Ref Prof Atty 6-hr sec
-# eqn chap Messrs Dist Dept ex-Mrs Vol Tech Supt Rte Reps Prop Mmes 8-oz
-# viz var seq prop pro-U.N.F.P nos mos min mil mEq ex-Gov eqns dept Yok
-# USN Ter Shak Sha Sens SS Ry Rul Presbyterian-St P.-T.A Msec McN Maj
-# Lond Jas Grev Gre Cir Cal Brig Aubr 42-degrees-F 400-lb 400-kc 36-in 3-hp
-# 3-by-6-ft 29-Oct 27-in 25-ft 24-in 160-ml 15,500-lb 12-oz 100-million-lb 10-yr
-# 1.0-mg 0.5-mv./m 0.1-mv./m 0.080-in 0.025-in
-
-# These are mostly from Brown Corpus, NLTK version, redacted by me (rdg):
-known_abbrs = {
-    'etc', 'Fig', 'No', 'Co', 'Sen', 'Gen', 'Rev', 'Gov', 'lb', 'Sec', 'vs',
-    'fig', 'Rep', 'Ave', 'cm', 'Corp', 'mg', 'mm', 'Figs', 'gm', 'ft',
-    'figs', 'Col', 'cf', 'lbs', 'Capt', 'cu', 'Atty', 'Prof', 'pp', 'sq',
-    'dia', 'cc', 'yrs', 'Hon', 'Stat', 'Ref', 'hr', 'Dist', 'Messrs',
-    'Dept', 'sec', 'eqn', 'Reps', 'Supt', 'dept', 'Rte', 'oz', 'Vol', 'ca',
-    'kc', 'hp', 'Prop', 'Mmes', 'Brig', 'USN', 'Cir', 'Bros', 'msec', 'viz',
-    'var', 'seq', 'prop', 'nos', 'ml', 'eqns', 'yd', 'Spec', 'Maj',
-    'Sr', 'Sra', 'Srta',    # Some Spanish forms of address.
-    }
-
-
-month_abbrs = {'Jan', 'Feb', 'Mar', 'Apr', 'Jun', 'Jul', 'Aug', 'Sep', 'Sept',
-                'Oct', 'Nov', 'Dec'}
-
+# The abbreviation detection, adapted from the first approach in
+# grefenstette94, is in abbreviations.py.
 
-# A few words match abbr_re but are not often abbreviations.
-non_abbrs = {'Act', 'Arts', 'End', 'Inn'}
-
-
-def is_abbreviation(word, nx):
-    return ((word in month_abbrs and nx[:1].isdigit()) or
-            (word not in non_abbrs and
-            (abbr_re.match(word) or word in known_abbrs)
-            ))
-
-
-class Readability(object):
-
-    def __init__(self, get_sentences=True,
-                        count_syllables=True,
-                        show_syllable_counts=False,
-                        dwords=None,
-                        dseparators=None,
-                        language='eng'):
-        self.nsentences = 0
-        self.nwords = 0
-        self.hard_words = 0
-        self.nsyllables = 0
-        self.language = language
-        self.nsyl = None
-        if count_syllables:
-            self.nsyl = self.nsyl_eng if language == 'eng' else self.nsyl_spa
-        self.show_syllable_counts = show_syllable_counts
-        self.get_sentences = get_sentences
-        self.dwords = dwords
-        self.dseparators = dseparators
 
-    def nsyl_eng(self, wd):
-        if wd == '' or enders_re.match(wd):
-            return 0
-        return syllable_count_eng(wd)
+def sentence_ends(tokens, is_abbreviation=is_abbreviation):
+    """Return the list of the indexes of the ends of the sentences in tokens.
 
-    def nsyl_spa(self, wd):
-        if wd == '' or enders_re.match(wd):
-            return 0
-        return syllable_count_spa(wd)
-
-    def sentence_breaker(self, text):
-        tokens = words_re.split(text)
-        assert tokens
-        num_tokens = len(tokens)
-        assert num_tokens & 1   # Odd
-        # A list of tokens.
-        sentence = []
-        # A list of sentences.
-        sentences = []
-        k = 1
-        while k < num_tokens:
-            while k < num_tokens:
-                sentence.extend(tokens[k-1:k+1])
-                token = tokens[k]
-                k += 2
-                if token[0] not in maybe_sentence_end_chars:
-                    continue
-                if k >= num_tokens:
-                    break
-                if token[0] in sentence_end_chars:
-                    break
-                assert token[0] == '.'
+    tokens is a list of alternating separators and words, beginning and
+    ending with a separator, as returned by words_re.split(). Each sentence
+    is the slice of tokens from the end of the previous one (or 0) to the
+    index in the list. The last separator is not in any sentence.
+    is_abbreviation(word, nx) tells if word, followed by a dot and then the
+    text nx, is an abbreviation; the default is that of the default
+    AbbreviationIndex.
+    """
+    num_tokens = len(tokens)
+    if num_tokens < 2:
+        return []
+    # The first character of a word tells which alternative of words_re it
+    # matched: only bang and question mark words begin with ! or ?, and
+    # only dot words and some numbers begin with a dot. So the words that
+    # may end a sentence are found with str.find() in a string of the first
+    # characters of all the words; the others are never looked at.
+    firsts = ''.join(map(first_char, tokens[1::2]))
+    # We'll assume a sentence ends if it's a bang or question mark.
+    ends = []
+    if '?' in firsts:
+        bangs = firsts.replace('?', '!')
+    else:
+        bangs = firsts
+    n = bangs.find('!')
+    while n >= 0:
+        ends.append(2 * n + 2)
+        n = bangs.find('!', n + 1)
+    # Dots are usually sentence enders but need to be checked for initials
+    # or abbreviations.
+    n = firsts.find('.')
+    if n >= 0:
+        dot_ends = []
+        while n >= 0:
+            k = 2 * n + 1
+            n = firsts.find('.', n + 1)
+            if k + 2 >= num_tokens:
+                # The last word; the sentence ends there anyway.
+                break
+            token = tokens[k]
+            if token != '.':
                 # Don't end with a number.
                 if token[1:2].isdigit():
                     continue
@@ -216,130 +159,214 @@ class Readability(object):
                     continue
                 # Not sure what two dots means, but consider it EOS.
                 # It may be an abbreviation period followed by full stop.
-                if token == '..':
-                    break
                 # If not standalone dot, consider it EOS.
-                if token != '.':
+                if token != '.)':
                     # This assert must be true due to regex used:
                         # \.\.\.+ | \.\. | \.'s | \.’s | \.["”'’)\]]*
-                    assert len(token) > 1 and token[1] in '"”\'’)]'
+                    assert token == '..' or token[1] in '"”\'’)]'
                     if token[1] in '\'’':
                         # Maybe possessive abbreviation, e.g. "Jr.'s"
                         continue
-                    if token not in ('.', '.)'):
-                        break
-                # Dot may be EOS or end of abbreviation (or both).
-                # Get following text.
-                nx = tokens[k-1] + tokens[k]
-                assert len(nx)
-                # Not EOS if followed by nonspace.
-                if not nx[:1].isspace():
+                    dot_ends.append(k + 1)
                     continue
-                nx = nx.lstrip()
-                # Not EOS if followed by space(s) then lowercase.
-                if nx[:1].islower():
-                    continue
-                if not (nx[:1].isupper() or nx[:1].isdigit()):
-                    break
-                # At beginning; can't look back!
-                if k - 4 < 0:
-                    break
-                # EOS if there is any separator before the dot:
-                if tokens[k - 3]:
-                    break
-                # Not EOS if preceding "word" is an abbreviation.
-                if is_abbreviation(tokens[k - 4], nx):
-                    continue
-                break
+            # Dot may be EOS or end of abbreviation (or both).
+            # Not EOS if followed by nonspace. (No word begins with a space.)
+            separator = tokens[k + 1]
+            if not separator[:1].isspace():
+                continue
+            # Get following text.
+            rest = separator.lstrip()
+            nx = rest[:1] or tokens[k + 2][0]
+            # Not EOS if followed by space(s) then lowercase.
+            if nx.islower():
+                continue
+            # Not EOS if followed by space(s) then uppercase or digit, and
+            # preceded with no separator by an abbreviation. (At the
+            # beginning, we can't look back.)
+            if ((nx.isupper() or nx.isdigit()) and k > 1 and not tokens[k - 1]
+                    and is_abbreviation(tokens[k - 2], rest + tokens[k + 2])):
+                continue
             # End of sentence
-            assert (len(sentence) & 1) == 0       # Even
-            sentence.append('')
-            sentences.append(sentence)
-            sentence = []
-        sentence.append(tokens[num_tokens - 1])
-        sentences.append(sentence)
+            dot_ends.append(k + 1)
+        if not ends:
+            ends = dot_ends
+        elif dot_ends:
+            ends.extend(dot_ends)
+            ends.sort()
+    # The last sentence ends at the last word.
+    if not ends or ends[-1] != num_tokens - 1:
+        ends.append(num_tokens - 1)
+    return ends
 
-        if len(sentences[-1]) == 1 and len(sentences) > 1:
-            # Last "sentence" is a single token; merge it into previous.
-            assert sentences[-2][-1] == ''
-            if sentences[-2][-1] != sentences[-1][0]:
-                sentences[-2][-1] = sentences[-1][0]
-            del sentences[-1]
 
-        # Whitespace after a sentence is now in the first element of the
-        # next sentence. Here, we move it to the end of the sentence it
-        # follows, so each sentence begins with non-whitespace.
-        # Some sentences begin with 'nonwords' with no whitespace;
-        # we leave those nonwords alone.
-        for k, sentence in enumerate(sentences):
-            if k < len(sentences) - 1:
-                assert len(sentence) & 1    # Odd
-                assert sentence[-1] == ''
-                next_sentence = sentences[k+1]
-                assert len(next_sentence) > 0
-                assert len(next_sentence) > 1
-                first_word_next_sent = next_sentence[0]
-                if spaces_re.search(first_word_next_sent) is not None:
-                    first_word_split = spaces_re.split(first_word_next_sent)
-                    sentence[-1] = ''.join(first_word_split[:-1])
-                    next_sentence[0] = first_word_split[-1]
-            elif (len(sentence) & 1) == 0:      # Even
-                # Can this ever happen?
-                raise Exception('sentence length is even! {%s}' % sentence)
-                sentence.append('')
-        return sentences
+def split_separator(separator):
+    """Split the separator after the end of a sentence.
 
-    def read(self, text_list):
-        nsyl = self.nsyl
-        dwords, dseparators = self.dwords, self.dseparators
-        show = self.show_syllable_counts
-        all_sentences = []
-        if isinstance(text_list, unicode if str is bytes else str):
-            text_list = [text_list]
-        if not isinstance(text_list, list):
-            raise TypeError('Expected list or Unicode string; got %s' %
-                            type(text_list))
-        for text in text_list:
-            if not isinstance(text, unicode if str is bytes else str):
-                raise TypeError('Expected list of Unicode string; got %s' %
-                                type(text))
-            sentences = self.sentence_breaker(text)
-            if self.get_sentences:
-                all_sentences.extend(sentences)
-            for sentence in sentences:
-                slen = len(sentence)
-                assert slen & 1     # Odd
-                hold_nwords = self.nwords
-                for k, wd in enumerate(sentence):
-                    if (k & 1) == 0:
-                        if dseparators is not None:
-                            dseparators[wd] = dseparators.get(wd, 0) + 1
-                    else:
-                        if dwords is not None:
-                            dwords[wd] = dwords.get(wd, 0) + 1
-                        if nsyl is None:
-                            self.nwords += 1  # Count words if not counting syl.
-                        else:
-                            nsylk = nsyl(wd)
-                            if nsylk != 0:
-                                self.nsyllables += nsylk
-                                self.nwords += 1    # Only count words w/ syllables.
-                                if nsylk > 2:
-                                    self.hard_words += 1
-                                if isinstance(show, str):
-                                    if 'word' in show and 'count' in show:
-                                        sentence[k] = show % dict(
-                                                word=sentence[k], count=nsylk)
-                                    else:
-                                        sentence[k] = show % (sentence[k], nsylk)
-                                elif show:
-                                    sentence[k] = '%s{%d}' % (sentence[k], nsylk)
-                if self.nwords > hold_nwords:
-                    self.nsentences += 1     # Only count sentences with words.
-        return all_sentences
+    Return the part of separator up to the end of its last run of
+    whitespace, which goes at the end of the sentence, and the rest, which
+    begins the next sentence.
+    """
+    if spaces_re.search(separator) is None:
+        return '', separator
+    pieces = spaces_re.split(separator)
+    return ''.join(pieces[:-1]), pieces[-1]
 
-    def get_dw_ds(self):
-        return dwords, dseparators
+
+def stream_ends(tokens, first, is_abbreviation, final=False):
+    """Return the sentence ends found in tokens at words first and after.
+
+    tokens is the tokens read so far of a longer text. Unless final is true,
+    the last word is left undecided, since the words that follow it may
+    change whether it ends a sentence. Only the two words before first are
+    looked at again.
+    """
+    start = max(0, first - 3)
+    last = len(tokens) - 1
+    return [end + start
+            for end in sentence_ends(tokens[start:], is_abbreviation)
+            if end + start > first and (final or end + start < last)]
+
+
+def whitespace_cut(text):
+    """Return the offset just after the last whitespace in text, or 0.
+
+    No word contains whitespace, so text up to there splits into words as
+    it would with more text after it.
+    """
+    if text[-1:].isspace():
+        return len(text)
+    return len(text) - len(text.rsplit(None, 1)[-1])
+
+
+def tokens_from_offsets(text, spans):
+    """Return the list of separators and words of text for word spans.
+
+    spans is a sequence of (start, end) offsets of the words in text, in
+    order; the text between them is the separators. Words may not be
+    empty. The list can be given to Readability.read_tokens().
+    """
+    tokens = []
+    pos = 0
+    for start, end in spans:
+        if not pos <= start < end:
+            raise ValueError('Word spans empty, out of order or overlapping '
+                                'at (%d, %d)' % (start, end))
+        tokens.append(text[pos:start])
+        tokens.append(text[start:end])
+        pos = end
+    tokens.append(text[pos:])
+    return tokens
+
+
+# The syllable counting modules are imported when a language is first used,
+# not when this module is. Importing syllable_count_eng_bf decodes the Bloom
+# filters and compiles the English rule regexes, which a program that only
+# counts words, or only reads Spanish, does not need.
+# For each counter: (module, word function, batch function).
+syllable_modules = {
+    'eng': ('.syllable_count_eng_bf',
+            'syllable_count_eng_bf', 'syllable_counts_eng_bf'),
+    'eng_lex': ('.syllable_lexicon',
+            'syllable_count_eng_lex', 'syllable_counts_eng_lex'),
+    'spa': ('.syllable_count_spa', 'syllable_count_spa', 'syllable_counts_spa'),
+    }
+
+syllable_counters = {}
+batch_syllable_counters = {}
+
+
+def load_syllable_counter(counter):
+    module_name, count_name, batch_name = syllable_modules[counter]
+    module = importlib.import_module(module_name, __package__)
+    count = getattr(module, count_name)
+
+    def nsyl(wd):
+        if wd == '' or enders_re.match(wd):
+            return 0
+        return count(wd)
+
+    syllable_counters[counter] = nsyl
+    batch_syllable_counters[counter] = getattr(module, batch_name)
+
+
+def get_syllable_counter(counter):
+    """Return the function Readability uses to count syllables in a word.
+
+    counter is 'eng', 'eng_lex' (English with lexicon), or 'spa'.
+    """
+    if counter not in syllable_counters:
+        load_syllable_counter(counter)
+    return syllable_counters[counter]
+
+
+def get_batch_syllable_counter(counter):
+    if counter not in batch_syllable_counters:
+        load_syllable_counter(counter)
+    return batch_syllable_counters[counter]
+
+
+def syllable_counts(words, language='eng', lexicon=False):
+    """Return array('i') of the syllable counts of a sequence of words.
+
+    The counts are those Readability uses: 0 for an empty string or a
+    sentence-ending token (dots, bangs, question marks). Each distinct word
+    is counted once.
+    """
+    lang = 'eng' if language == 'eng' else 'spa'
+    if lexicon and lang == 'eng':
+        lang = 'eng_lex'
+    unique = [wd for wd in unique_words(words)
+                if wd != '' and not enders_re.match(wd)]
+    counts = dict(zip(unique, get_batch_syllable_counter(lang)(unique)))
+    counts.update((wd, 0) for wd in words if wd not in counts)
+    return broadcast_counts(words, counts)
+
+
+# Syllable caches are shared by all Readability instances for a language, so
+# a program scoring many documents only counts each distinct word once.
+syllable_caches = {}
+
+
+def get_syllable_cache(language):
+    """Return the shared SyllableCache for language, creating it if needed."""
+    cache = syllable_caches.get(language)
+    if cache is None:
+        cache = syllable_caches[language] = SyllableCache(
+                get_syllable_counter(language))
+    return cache
+
+
+def text_key_function(counter, abbreviations=''):
+    """Return a function of text giving its key in a result cache.
+
+    The key is a 16-byte hash of the text, of the syllable counter ('eng',
+    'eng_lex', 'spa', or 'words' if syllables are not counted), and of the
+    signature() of the AbbreviationIndex if it is not the default one.
+    """
+    import hashlib  # only here; it adds to the time to import this module
+    prefix = ('%s\0' % counter).encode('ascii')
+    if abbreviations:
+        prefix += ('%s\0' % abbreviations).encode('utf-8')
+    try:
+        blake2b = hashlib.blake2b
+
+        def text_key(text):
+            return blake2b(prefix + text.encode('utf-8', 'surrogatepass'),
+                           digest_size=16).digest()
+    except AttributeError:  # Python 2
+        md5 = hashlib.md5
+
+        def text_key(text):
+            return md5(prefix + text.encode('utf-8')).digest()
+    return text_key
+
+
+class ReadabilityMeasures(object):
+    """Readability formulas, computed from the counts nsentences, nwords,
+    nsyllables, and hard_words of the object they are mixed into.
+    """
+
+    __slots__ = ()
 
     def stats(self):
         return self.nsentences, self.nwords, self.nsyllables
@@ -468,3 +495,648 @@ class Readability(object):
             return 'quite easy'
         else:
             return 'very easy'
+
+
+class ReadabilityStats(ReadabilityMeasures):
+    """The sentence, word, syllable, and hard word counts of some text.
+
+    Stats objects for parts of a document (or for several documents) can be
+    added or merged to get the stats of the whole, and all the readability
+    formulas can be computed from them. They serialize to 32 bytes with
+    to_bytes() or to a small JSON object with to_json().
+    """
+
+    __slots__ = ('nsentences', 'nwords', 'nsyllables', 'hard_words')
+
+    packer = struct.Struct(str('<4Q'))
+
+    def __init__(self, nsentences=0, nwords=0, nsyllables=0, hard_words=0):
+        self.nsentences = nsentences
+        self.nwords = nwords
+        self.nsyllables = nsyllables
+        self.hard_words = hard_words
+
+    def counts(self):
+        return self.nsentences, self.nwords, self.nsyllables, self.hard_words
+
+    def __repr__(self):
+        return ('%s(nsentences=%d, nwords=%d, nsyllables=%d, hard_words=%d)'
+                % ((type(self).__name__,) + self.counts()))
+
+    def __eq__(self, other):
+        if not isinstance(other, ReadabilityStats):
+            return NotImplemented
+        return self.counts() == other.counts()
+
+    def __ne__(self, other):
+        if not isinstance(other, ReadabilityStats):
+            return NotImplemented
+        return self.counts() != other.counts()
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return type(self), self.counts()
+
+    def merge(self, other):
+        """Add the counts of other (stats or Readability object) to these."""
+        self.nsentences += other.nsentences
+        self.nwords += other.nwords
+        self.nsyllables += other.nsyllables
+        self.hard_words += other.hard_words
+        return self
+
+    def __iadd__(self, other):
+        if not isinstance(other, (ReadabilityStats, Readability)):
+            return NotImplemented
+        return self.merge(other)
+
+    def __add__(self, other):
+        if not isinstance(other, (ReadabilityStats, Readability)):
+            return NotImplemented
+        return type(self)(*self.counts()).merge(other)
+
+    def __radd__(self, other):
+        # So sum() works on a sequence of stats.
+        if other == 0:
+            return type(self)(*self.counts())
+        return NotImplemented
+
+    def subtract(self, other):
+        """Take the counts of other (stats or Readability object) from these.
+
+        Counts cannot go below zero: if other has more of any count than
+        these, ValueError is raised and these are left unchanged.
+        """
+        counts = self.counts()
+        other_counts = (other.nsentences, other.nwords, other.nsyllables,
+                        other.hard_words)
+        if any(n < m for n, m in zip(counts, other_counts)):
+            raise ValueError('Cannot subtract counts %r from %r' %
+                                (other_counts, counts))
+        self.nsentences -= other.nsentences
+        self.nwords -= other.nwords
+        self.nsyllables -= other.nsyllables
+        self.hard_words -= other.hard_words
+        return self
+
+    def __isub__(self, other):
+        if not isinstance(other, (ReadabilityStats, Readability)):
+            return NotImplemented
+        return self.subtract(other)
+
+    def __sub__(self, other):
+        if not isinstance(other, (ReadabilityStats, Readability)):
+            return NotImplemented
+        return type(self)(*self.counts()).subtract(other)
+
+    def to_bytes(self):
+        """Return the counts as 32 bytes; they must not be negative."""
+        try:
+            return self.packer.pack(*self.counts())
+        except struct.error:
+            raise ValueError('Cannot serialize counts %r' % (self.counts(),))
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(*cls.packer.unpack(data))
+
+    def to_dict(self):
+        return dict(nsentences=self.nsentences, nwords=self.nwords,
+                    nsyllables=self.nsyllables, hard_words=self.hard_words)
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['nsentences'], d['nwords'], d['nsyllables'],
+                    d['hard_words'])
+
+    def to_json(self):
+        import json     # only here; it adds to the time to import this module
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    @classmethod
+    def from_json(cls, s):
+        import json
+        return cls.from_dict(json.loads(s))
+
+
+class ReadabilityProfile(object):
+    """Time spent in each stage of Readability.read(), and cache hits.
+
+    Pass profile=True (or a ReadabilityProfile, to share one among several
+    objects) to Readability() to have read() time its stages:
+        tokenize    splitting text into words and separators
+        breaks      finding the sentence breaks
+        fixup       making the sentence lists and moving whitespace
+        dicts       counting words and separators in dwords, dseparators
+        syllables   counting sentences, words, and syllables
+    The syllable cache hits and misses during read() are also counted.
+    """
+
+    stages = ('tokenize', 'breaks', 'fixup', 'dicts', 'syllables')
+
+    def __init__(self, timer=timeit.default_timer):
+        self.timer = timer
+        self.reset()
+
+    def reset(self):
+        self.seconds = dict.fromkeys(self.stages, 0.0)
+        self.calls = dict.fromkeys(self.stages, 0)
+        self.texts = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, stage, seconds):
+        self.seconds[stage] += seconds
+        self.calls[stage] += 1
+
+    def add_cache_info(self, before, after):
+        self.cache_hits += after.hits - before.hits
+        self.cache_misses += after.misses - before.misses
+
+    def as_dict(self):
+        """Return the times, call counts, and cache hits as a dict."""
+        lookups = self.cache_hits + self.cache_misses
+        return dict(
+            texts=self.texts,
+            seconds=sum(self.seconds.values()),
+            stages=dict((stage, dict(seconds=self.seconds[stage],
+                                    calls=self.calls[stage]))
+                        for stage in self.stages),
+            syllable_cache=dict(hits=self.cache_hits,
+                                misses=self.cache_misses,
+                                hit_rate=self.cache_hits / lookups
+                                            if lookups else 0.0))
+
+
+class Readability(ReadabilityMeasures):
+
+    def __init__(self, get_sentences=True,
+                        count_syllables=True,
+                        show_syllable_counts=False,
+                        dwords=None,
+                        dseparators=None,
+                        language='eng',
+                        cache_syllables=True,
+                        lexicon=False,
+                        profile=None,
+                        result_cache=None,
+                        abbreviations=()):
+        self.nsentences = 0
+        self.nwords = 0
+        self.hard_words = 0
+        self.nsyllables = 0
+        self.language = language
+        self.nsyl = None
+        lang = 'words'
+        if count_syllables:
+            lang = 'eng' if language == 'eng' else 'spa'
+            if lexicon and lang == 'eng':
+                lang = 'eng_lex'
+            if cache_syllables:
+                self.nsyl = get_syllable_cache(lang)
+            else:
+                self.nsyl = get_syllable_counter(lang)
+        self.show_syllable_counts = show_syllable_counts
+        self.get_sentences = get_sentences
+        self.dwords = dwords
+        self.dseparators = dseparators
+        if profile is True:
+            profile = ReadabilityProfile()
+        self.profile = profile or None
+        if not isinstance(abbreviations, AbbreviationIndex):
+            abbreviations = get_abbreviation_index(language, abbreviations)
+        self.abbreviations = abbreviations
+        self.is_abbreviation = abbreviations.is_abbreviation
+        self.result_cache = result_cache
+        if result_cache is not None:
+            self.text_key = text_key_function(lang, abbreviations.signature())
+
+    def nsyl_eng(self, wd):
+        return get_syllable_counter('eng')(wd)
+
+    def nsyl_spa(self, wd):
+        return get_syllable_counter('spa')(wd)
+
+    def sentence_breaker(self, text):
+        tokens = words_re.split(text)
+        return self.make_sentences(tokens,
+                                   sentence_ends(tokens, self.is_abbreviation))
+
+    def make_sentences(self, tokens, ends):
+        """Return the list of sentences of tokens, ending at each of ends.
+
+        Whitespace between sentences is moved to the end of the sentence
+        before it.
+        """
+        assert tokens
+        num_tokens = len(tokens)
+        assert num_tokens & 1   # Odd
+        # A list of sentences, each a list of tokens.
+        sentences = []
+        start = 0
+        for end in ends:
+            sentence = tokens[start:end]
+            assert (len(sentence) & 1) == 0       # Even
+            sentence.append('')
+            sentences.append(sentence)
+            start = end
+        sentences.append([tokens[num_tokens - 1]])
+
+        if len(sentences[-1]) == 1 and len(sentences) > 1:
+            # Last "sentence" is a single token; merge it into previous.
+            assert sentences[-2][-1] == ''
+            if sentences[-2][-1] != sentences[-1][0]:
+                sentences[-2][-1] = sentences[-1][0]
+            del sentences[-1]
+
+        # Whitespace after a sentence is now in the first element of the
+        # next sentence. Here, we move it to the end of the sentence it
+        # follows, so each sentence begins with non-whitespace.
+        # Some sentences begin with 'nonwords' with no whitespace;
+        # we leave those nonwords alone.
+        for k, sentence in enumerate(sentences):
+            if k < len(sentences) - 1:
+                assert len(sentence) & 1    # Odd
+                assert sentence[-1] == ''
+                next_sentence = sentences[k+1]
+                assert len(next_sentence) > 0
+                assert len(next_sentence) > 1
+                sentence[-1], next_sentence[0] = split_separator(
+                        next_sentence[0])
+            elif (len(sentence) & 1) == 0:      # Even
+                # Can this ever happen?
+                raise Exception('sentence length is even! {%s}' % sentence)
+                sentence.append('')
+        return sentences
+
+    def read(self, text_list):
+        all_sentences = []
+        if isinstance(text_list, unicode if str is bytes else str):
+            text_list = [text_list]
+        if not isinstance(text_list, list):
+            raise TypeError('Expected list or Unicode string; got %s' %
+                            type(text_list))
+        profile = self.profile
+        for text in text_list:
+            if not isinstance(text, unicode if str is bytes else str):
+                raise TypeError('Expected list of Unicode string; got %s' %
+                                type(text))
+            if profile is not None:
+                sentences = self.read_profiled(text, profile)
+                if self.get_sentences:
+                    all_sentences.extend(sentences)
+                continue
+            if not self.get_sentences and self.dseparators is None:
+                # Sentences and separators are not wanted; just count.
+                if self.result_cache is not None and self.dwords is None:
+                    self.count_text_cached(text)
+                else:
+                    self.count_text(text)
+                continue
+            sentences = self.sentence_breaker(text)
+            if self.get_sentences:
+                all_sentences.extend(sentences)
+            self.count_sentences(sentences)
+        return all_sentences
+
+    def read_stream(self, source, chunk_size=STREAM_CHUNK_SIZE):
+        """Generate the sentences of text read piecemeal from source.
+
+        source may be a file-like object opened in text mode (read in
+        chunk_size pieces), a Unicode string, or any iterable of Unicode
+        strings. The pieces are treated as one continuous text, so a
+        sentence may span pieces; the result is the same as read() of the
+        concatenated text. Sentences are counted as they are generated, so
+        the counts are complete once the generator is exhausted.
+        """
+        if hasattr(source, 'read'):
+            chunks = iter(lambda: source.read(chunk_size), '')
+        elif isinstance(source, unicode if str is bytes else str):
+            chunks = [source]
+        else:
+            chunks = source
+        # tokens holds the separators and words read but not yet in a
+        # generated sentence, and ends the sentence ends found in them; the
+        # words from tokens[undecided] on are not yet known to end a
+        # sentence or not. partial is the text after the last whitespace
+        # read, which may be the start of a word continued in the next
+        # piece. So each piece is split into words and searched for
+        # sentence ends only once, however long a sentence is.
+        tokens = ['']
+        ends = []
+        undecided = 1
+        partial = []
+        is_abbreviation = self.is_abbreviation
+        for text in chunks:
+            if not isinstance(text, unicode if str is bytes else str):
+                raise TypeError('Expected Unicode string; got %s' %
+                                type(text))
+            if not text:
+                continue
+            cut = whitespace_cut(text)
+            if not cut:
+                partial.append(text)
+                continue
+            partial.append(text[:cut])
+            new_tokens = words_re.split(''.join(partial))
+            partial = [text[cut:]]
+            tokens[-1] += new_tokens[0]
+            tokens.extend(new_tokens[1:])
+            if len(tokens) < 3:
+                continue
+            ends.extend(stream_ends(tokens, undecided, is_abbreviation))
+            undecided = len(tokens) - 2
+            # Generate the sentences up to the last end followed by a word
+            # already decided; the word after the end is looked back from
+            # when deciding the word after it.
+            n = len(ends)
+            while n and ends[n - 1] + 1 >= undecided:
+                n -= 1
+            if not n:
+                continue
+            end = ends[n - 1]
+            sentences = self.make_sentences(tokens[:end + 1], ends[:n])
+            sentences[-1][-1], rest = split_separator(tokens[end])
+            del tokens[:end]
+            tokens[0] = rest
+            ends = [k - end for k in ends[n:]]
+            undecided -= end
+            self.count_sentences(sentences)
+            for sentence in sentences:
+                yield sentence
+        # Even empty input makes a sentence (of one empty separator), as
+        # in read().
+        new_tokens = words_re.split(''.join(partial))
+        tokens[-1] += new_tokens[0]
+        tokens.extend(new_tokens[1:])
+        ends.extend(stream_ends(tokens, undecided, is_abbreviation, True))
+        sentences = self.make_sentences(tokens, ends)
+        self.count_sentences(sentences)
+        for sentence in sentences:
+            yield sentence
+
+    def read_file(self, path, encoding='utf-8', window_size=MAP_WINDOW_SIZE):
+        """Read the text of file path, memory-mapped a window at a time.
+
+        The file is never read or decoded whole; the windows are read as
+        one continuous text by read_stream(), so the result is as for
+        read() of the file's text.
+        """
+        sentences = self.read_stream(mapped_text(path, encoding, window_size))
+        if self.get_sentences:
+            return list(sentences)
+        for _ in sentences:
+            pass
+        return []
+
+    def make_offsets(self, tokens, ends):
+        """Return array('i') of the start and end offsets of each sentence.
+
+        The sentences are those make_sentences(tokens, ends) returns, and
+        the offsets are into the text tokens were split from, so sentence k
+        is text[offsets[2*k]:offsets[2*k+1]].
+        """
+        bounds = [0]
+        pos = 0
+        start = 0
+        ends = list(ends)
+        # The last sentence gets the rest of the text.
+        for end in ends[:-1]:
+            pos += sum(map(len, tokens[start:end]))
+            start = end
+            # Whitespace at the start of the separator goes with the
+            # sentence before it, as in make_sentences().
+            sep = tokens[end]
+            bounds.append(pos + len(sep) - len(spaces_re.split(sep)[-1]))
+        length = pos + sum(map(len, tokens[start:]))
+        offsets = array(str('i') if length < 2**31 else str('q'))
+        for k in range(len(bounds) - 1):
+            offsets.append(bounds[k])
+            offsets.append(bounds[k+1])
+        offsets.append(bounds[-1])
+        offsets.append(length)
+        return offsets
+
+    def read_offsets(self, text, token_offsets=False):
+        """Read text; return array('i') of sentence start and end offsets.
+
+        The counts are as for read(), but instead of lists of tokens the
+        sentences are returned as pairs of offsets into text: sentence k is
+        text[offsets[2*k]:offsets[2*k+1]]. If token_offsets is true, return
+        (sentence offsets, word offsets), where the word offsets are the
+        start and end of each word in the same form.
+        """
+        if not isinstance(text, unicode if str is bytes else str):
+            raise TypeError('Expected Unicode string; got %s' % type(text))
+        tokens = words_re.split(text)
+        ends = sentence_ends(tokens, self.is_abbreviation)
+        if self.dseparators is None:
+            self.count_tokens(tokens, ends)
+        else:
+            # Separators are counted as they are after whitespace is moved.
+            self.count_sentences(self.make_sentences(tokens, ends))
+        offsets = self.make_offsets(tokens, ends)
+        if not token_offsets:
+            return offsets
+        word_offsets = array(offsets.typecode)
+        pos = 0
+        for k, token in enumerate(tokens):
+            if k & 1:
+                word_offsets.append(pos)
+                word_offsets.append(pos + len(token))
+            pos += len(token)
+        return offsets, word_offsets
+
+    def read_tokens(self, tokens):
+        """Read text that has already been split into words and separators.
+
+        tokens is a sequence of alternating separators and words, beginning
+        and ending with a separator (which may be empty), laid out as
+        words_re.split() would make it; tokens_from_offsets() makes one from
+        word offsets. Words may not be empty. Sentence-ending punctuation
+        (. ! ?) must be words of its own for the sentence breaks to be
+        found. Only the sentence breaking and counting are done; the result
+        is as for read().
+        """
+        if not isinstance(tokens, list):
+            tokens = list(tokens)
+        if not len(tokens) & 1:
+            raise ValueError('Expected an odd number of tokens; got %d' %
+                                len(tokens))
+        words = tokens[1::2]
+        if '' in words:
+            raise ValueError('Empty word token at %d' %
+                                (2 * words.index('') + 1))
+        if self.profile is not None:
+            sentences = self.read_profiled(None, self.profile, tokens)
+        elif not self.get_sentences and self.dseparators is None:
+            self.count_tokens(tokens,
+                              sentence_ends(tokens, self.is_abbreviation))
+            return []
+        else:
+            sentences = self.make_sentences(
+                    tokens, sentence_ends(tokens, self.is_abbreviation))
+            self.count_sentences(sentences)
+        return sentences if self.get_sentences else []
+
+    def read_profiled(self, text, profile, tokens=None):
+        """Read text (or tokens) as read() does, timing each stage in profile.
+
+        The word and separator counts (dwords and dseparators) are updated
+        in a pass of their own, so their time can be told apart from the
+        syllable counting.
+        """
+        timer = profile.timer
+        if tokens is None:
+            t0 = timer()
+            tokens = words_re.split(text)
+            profile.add('tokenize', timer() - t0)
+        t0 = timer()
+        ends = sentence_ends(tokens, self.is_abbreviation)
+        profile.add('breaks', timer() - t0)
+        if not self.get_sentences and self.dseparators is None:
+            sentences = []
+            if self.dwords is not None:
+                t0 = timer()
+                self.update_dicts([tokens[:ends[-1]] if ends else []])
+                profile.add('dicts', timer() - t0)
+            info = self.syllable_cache_info()
+            t0 = timer()
+            self.count_tokens(tokens, ends, update_dicts=False)
+        else:
+            t0 = timer()
+            sentences = self.make_sentences(tokens, ends)
+            profile.add('fixup', timer() - t0)
+            if self.dwords is not None or self.dseparators is not None:
+                t0 = timer()
+                self.update_dicts(sentences)
+                profile.add('dicts', timer() - t0)
+            info = self.syllable_cache_info()
+            t0 = timer()
+            self.count_sentences(sentences, update_dicts=False)
+        profile.add('syllables', timer() - t0)
+        if info is not None:
+            profile.add_cache_info(info, self.syllable_cache_info())
+        profile.texts += 1
+        return sentences
+
+    def update_dicts(self, sentences):
+        """Count the words and separators of sentences in dwords and dseparators."""
+        dwords, dseparators = self.dwords, self.dseparators
+        if dseparators is not None:
+            count_into(dseparators, [wd for sentence in sentences
+                                        for wd in sentence[0::2]])
+        if dwords is not None:
+            count_into(dwords, [wd for sentence in sentences
+                                    for wd in sentence[1::2]])
+
+    def count_sentences(self, sentences, update_dicts=True):
+        """Count the sentences, words, and syllables in sentences.
+
+        sentences is a list of sentences as returned by sentence_breaker().
+        If show_syllable_counts is set, the words in them are replaced by
+        the word with its count. Words and separators are counted in dwords
+        and dseparators unless update_dicts is false.
+        """
+        nsyl = self.nsyl
+        if update_dicts:
+            # Before show_syllable_counts changes the words.
+            self.update_dicts(sentences)
+        show = self.show_syllable_counts
+        for sentence in sentences:
+            slen = len(sentence)
+            assert slen & 1     # Odd
+            hold_nwords = self.nwords
+            for k, wd in enumerate(sentence):
+                if k & 1:
+                    if nsyl is None:
+                        self.nwords += 1  # Count words if not counting syl.
+                    else:
+                        nsylk = nsyl(wd)
+                        if nsylk != 0:
+                            self.nsyllables += nsylk
+                            self.nwords += 1    # Only count words w/ syllables.
+                            if nsylk > 2:
+                                self.hard_words += 1
+                            if isinstance(show, str):
+                                if 'word' in show and 'count' in show:
+                                    sentence[k] = show % dict(
+                                            word=sentence[k], count=nsylk)
+                                else:
+                                    sentence[k] = show % (sentence[k], nsylk)
+                            elif show:
+                                sentence[k] = '%s{%d}' % (sentence[k], nsylk)
+            if self.nwords > hold_nwords:
+                self.nsentences += 1     # Only count sentences with words.
+
+    def count_text(self, text):
+        """Count the sentences, words, and syllables in text.
+
+        This gives the same counts as count_sentences(sentence_breaker(text))
+        but does not make the sentence lists nor move whitespace between
+        them, and does not count separators.
+        """
+        tokens = words_re.split(text)
+        self.count_tokens(tokens, sentence_ends(tokens, self.is_abbreviation))
+
+    def count_text_cached(self, text):
+        """Count text as count_text() does, looking it up in result_cache."""
+        cache = self.result_cache
+        key = self.text_key(text)
+        value = cache.get(key)
+        if value is None:
+            before = self.statistics()
+            self.count_text(text)
+            cache.put(key, (self.statistics() - before).to_bytes())
+            return
+        stats = ReadabilityStats.from_bytes(value)
+        self.nsentences += stats.nsentences
+        self.nwords += stats.nwords
+        self.nsyllables += stats.nsyllables
+        self.hard_words += stats.hard_words
+
+    def count_tokens(self, tokens, ends, update_dicts=True):
+        """Count the sentences of tokens ending at each of ends; see count_text()."""
+        nsyl = self.nsyl
+        if update_dicts and self.dwords is not None:
+            # The sentences cover all the words.
+            count_into(self.dwords, tokens[1::2])
+        nsentences, nwords, nsyllables, hard_words = 0, 0, 0, 0
+        start = 0
+        for end in ends:
+            words = tokens[start+1:end:2]
+            start = end
+            if nsyl is None:
+                # Count words if not counting syl.; every sentence has some.
+                nwords += len(words)
+                nsentences += 1
+                continue
+            hold_nwords = nwords
+            for wd in words:
+                nsylk = nsyl(wd)
+                if nsylk != 0:
+                    nsyllables += nsylk
+                    nwords += 1     # Only count words w/ syllables.
+                    if nsylk > 2:
+                        hard_words += 1
+            if nwords > hold_nwords:
+                nsentences += 1     # Only count sentences with words.
+        self.nsentences += nsentences
+        self.nwords += nwords
+        self.nsyllables += nsyllables
+        self.hard_words += hard_words
+
+    def syllable_cache_info(self):
+        """Return hit/miss/eviction counts of the shared syllable cache."""
+        if isinstance(self.nsyl, SyllableCache):
+            return self.nsyl.cache_info()
+        return None
+
+    def get_dw_ds(self):
+        return dwords, dseparators
+
+    def statistics(self):
+        """Return the counts so far as a ReadabilityStats object."""
+        return ReadabilityStats(self.nsentences, self.nwords,
+                                self.nsyllables, self.hard_words)
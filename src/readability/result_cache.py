@@ -0,0 +1,139 @@
+#! /usr/bin/env python
+# vim: set fileencoding=utf-8
+
+# Python 2 or 3
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""result_cache.py -- caches of the counts of texts already read.
+
+The same paragraphs are often read again and again: reposted documents,
+boilerplate, templated mail. Give Readability(result_cache=...) one of
+these caches and read() looks up each text of its list by a hash of the
+text and of the options that affect the counts; on a hit it adds the
+cached counts without tokenizing the text at all.
+
+A cache maps a key (bytes) to the ReadabilityStats.to_bytes() of the text
+(bytes). Any object with get(key), returning the value or None, and
+put(key, value) will do. ResultCache keeps the values in memory;
+SQLiteResultCache keeps them in an SQLite database file, so they last
+from one run to the next. Both drop the least recently used values when
+they hold maxsize of them.
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+from .syllable_cache import CacheInfo, LRUCache
+
+
+DEFAULT_MAXSIZE = 100000
+
+
+class ResultCache(LRUCache):
+    """In-memory LRU cache of text counts."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        LRUCache.__init__(self, maxsize)
+
+
+class SQLiteResultCache(object):
+    """LRU cache of text counts in an SQLite database file.
+
+    Changes are committed after every commit_every of them, and by
+    commit() or close(); use the object as a context manager to close it.
+    When the database holds more than maxsize values, the least recently
+    used tenth of them are deleted. Several processes may share a
+    database; each enforces maxsize on its own.
+    """
+
+    def __init__(self, path, maxsize=DEFAULT_MAXSIZE, commit_every=1000):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1; got %r' % maxsize)
+        self.path = path
+        self.maxsize = maxsize
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        import sqlite3  # only here; it adds to the time to import readability
+        self.Binary = sqlite3.Binary
+        self.db = sqlite3.connect(path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS results '
+                        '(key BLOB PRIMARY KEY, value BLOB, used INTEGER)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS results_used '
+                        'ON results (used)')
+        self.db.commit()
+        self.size, used = self.db.execute(
+                'SELECT COUNT(*), MAX(used) FROM results').fetchone()
+        self.clock = used or 0
+        self.pending = 0
+
+    def get(self, key):
+        key = self.Binary(key)
+        row = self.db.execute('SELECT value FROM results WHERE key = ?',
+                              (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.clock += 1
+        self.db.execute('UPDATE results SET used = ? WHERE key = ?',
+                        (self.clock, key))
+        self.changed()
+        return bytes(row[0])
+
+    def put(self, key, value):
+        self.clock += 1
+        key, value = self.Binary(key), self.Binary(value)
+        cursor = self.db.execute(
+                'INSERT OR IGNORE INTO results VALUES (?, ?, ?)',
+                (key, value, self.clock))
+        if cursor.rowcount > 0:
+            self.size += 1
+        else:
+            self.db.execute('UPDATE results SET value = ?, used = ? '
+                            'WHERE key = ?', (value, self.clock, key))
+        if self.size > self.maxsize:
+            self.evict(max(1, self.maxsize // 10))
+        self.changed()
+
+    def evict(self, n):
+        cursor = self.db.execute('DELETE FROM results WHERE key IN (SELECT '
+                                 'key FROM results ORDER BY used LIMIT ?)',
+                                 (n,))
+        self.evictions += cursor.rowcount
+        self.size = self.db.execute(
+                'SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def changed(self):
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        self.db.commit()
+        self.pending = 0
+
+    def close(self):
+        if self.db is not None:
+            self.commit()
+            self.db.close()
+            self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def cache_info(self):
+        return CacheInfo(self.hits, self.misses, self.evictions,
+                         self.maxsize, self.size)
+
+    def cache_clear(self):
+        """Delete all cached values and reset the counters."""
+        self.db.execute('DELETE FROM results')
+        self.commit()
+        self.size = self.clock = 0
+        self.hits = self.misses = self.evictions = 0
@@ -0,0 +1,460 @@
+#! /usr/bin/env python3
+# vim: set fileencoding=utf-8
+
+# Python 3 only (asyncio)
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""server.py -- readability scoring HTTP server.
+
+Usage: python -m readability.server [options]
+
+Options:
+    -a address          address to listen on; default 127.0.0.1
+    -p port             port to listen on; default 8000
+    -j workers          number of worker threads or processes; default
+                          is the number of CPUs
+    -P                  score in worker processes rather than threads
+    -b batch_size       most requests to score in one worker call; default 32
+    -d batch_delay      seconds to wait for more requests to fill a batch;
+                          default 0.002
+    -q max_pending      most requests queued or being scored; more get
+                          503 Service Unavailable; default 1000
+    -t timeout          seconds to wait for a score; default 30
+
+Requests:
+    POST /score     Score the body. The body is either a JSON object
+                    {"text": ..., "language": "eng" or "spa", "lexicon":
+                    true or false} (with Content-Type application/json), or
+                    the UTF-8 text itself, with language and lexicon
+                    optionally given in the query string, e.g.
+                    /score?language=spa. The response is a JSON object
+                    with the counts and the measures for the language.
+    GET /metrics    JSON object with request counts and a histogram of the
+                    time taken to answer /score requests.
+
+Requests that arrive together are scored in batches, so a worker call (and
+for worker processes, the pickling of text and results) is shared by many
+small requests, and the event loop only parses HTTP and hands work off.
+Only one batch per worker is handed off at a time; other requests wait in
+the queue, and those that time out there are never scored.
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+import os
+import sys
+import json
+import time
+import getopt
+import asyncio
+import concurrent.futures
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+
+from .readability import Readability, ReadabilityStats
+
+
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_BATCH_DELAY = 0.002
+DEFAULT_MAX_PENDING = 1000
+DEFAULT_TIMEOUT = 30.0
+HEADER_TIMEOUT = 10.0
+MAX_HEADER_LINES = 100
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5,
+                   1.0, 2.0, 5.0, 10.0, 30.0, float('inf'))
+
+try:
+    current_task = asyncio.current_task
+except AttributeError:      # Python 3.6
+    current_task = asyncio.Task.current_task
+
+measure_names = {
+    'eng': ('FRES', 'FK_grade', 'Fog_index', 'SMOG_index'),
+    'spa': ('Huerta_ease', 'Huerta_corrected', 'IFSZ_index', 'Inflesz_scale'),
+    }
+
+
+def score_batch(jobs):
+    """Return a list of counts tuples, one for each (text, language, lexicon).
+
+    This runs in a worker thread or process.
+    """
+    results = []
+    for text, language, lexicon in jobs:
+        rb = Readability(get_sentences=False, language=language,
+                            lexicon=lexicon)
+        rb.read(text)
+        results.append(rb.statistics().counts())
+    return results
+
+
+def score_result(counts, language):
+    """Return a dict of the counts and measures for language."""
+    stats = ReadabilityStats(*counts)
+    result = stats.to_dict()
+    result['language'] = language
+    for name in measure_names[language]:
+        result[name] = getattr(stats, name)()
+    return result
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=''):
+        Exception.__init__(self, message or HTTPStatus(status).phrase)
+        self.status = status
+
+
+def parse_flag(value, name):
+    """Return value, a JSON boolean or a string such as "true" or "0", as a
+    bool; raise HTTPError 400 for anything else.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in ('1', 'true', 'yes', 'on'):
+            return True
+        if value in ('0', 'false', 'no', 'off', ''):
+            return False
+    raise HTTPError(400, '%s must be true or false' % name)
+
+
+class LatencyHistogram(object):
+    """Counts of latencies falling in each of LATENCY_BUCKETS."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, seconds):
+        for k, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[k] += 1
+                break
+        self.total += seconds
+        self.count += 1
+
+    def as_dict(self):
+        return dict(count=self.count, sum=self.total,
+                    buckets=[['+Inf' if bound == float('inf') else bound, n]
+                             for bound, n in zip(self.buckets, self.counts)])
+
+
+class ScoringServer(object):
+    """asyncio HTTP server that scores text in batches on an executor."""
+
+    def __init__(self, host='127.0.0.1', port=8000, workers=None,
+                    processes=False, batch_size=DEFAULT_BATCH_SIZE,
+                    batch_delay=DEFAULT_BATCH_DELAY,
+                    max_pending=DEFAULT_MAX_PENDING, timeout=DEFAULT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        if processes:
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                                                                self.workers)
+        else:
+            self.executor = concurrent.futures.ThreadPoolExecutor(self.workers)
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.queue = None
+        self.server = None
+        self.batcher = None
+        self.idle_workers = None    # semaphore: one per worker not scoring
+        self.batches = set()        # batch tasks being scored
+        self.connections = {}       # handler task: its stream writer
+        self.metrics = dict(requests=0, scored=0, errors=0, rejected=0,
+                            timeouts=0, batches=0, words=0)
+        self.latency = LatencyHistogram()
+
+    async def start(self):
+        """Start listening; return the asyncio server."""
+        self.queue = asyncio.Queue()
+        self.idle_workers = asyncio.Semaphore(self.workers)
+        self.batcher = asyncio.ensure_future(self.run_batches())
+        self.server = await asyncio.start_server(self.handle_connection,
+                                                    self.host, self.port)
+        # If port 0 was asked for, get the one assigned.
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def close(self):
+        self.server.close()
+        for writer in self.connections.values():
+            writer.close()
+        if self.connections:
+            await asyncio.wait(list(self.connections))
+        await self.server.wait_closed()
+        self.batcher.cancel()
+        try:
+            await self.batcher
+        except asyncio.CancelledError:
+            pass
+        if self.batches:
+            await asyncio.wait(list(self.batches))
+        self.executor.shutdown(wait=True)
+
+    async def score(self, text, language='eng', lexicon=False):
+        """Queue text to be scored; return its counts tuple."""
+        if self.pending >= self.max_pending:
+            self.metrics['rejected'] += 1
+            raise HTTPError(503, 'Too many requests pending')
+        self.pending += 1
+        future = asyncio.get_event_loop().create_future()
+        try:
+            self.queue.put_nowait(((text, language, lexicon), future))
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.metrics['timeouts'] += 1
+            raise HTTPError(504, 'Timed out scoring text')
+        finally:
+            self.pending -= 1
+
+    async def run_batches(self):
+        """Take requests from the queue and score them in batches.
+
+        A batch is taken only when a worker is idle, so requests wait in
+        the queue, where those that time out are dropped, rather than in
+        the executor, where they would be scored anyway.
+        """
+        loop = asyncio.get_event_loop()
+        while True:
+            await self.idle_workers.acquire()
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_delay
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                wait = deadline - loop.time()
+                if wait <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(),
+                                                        wait))
+                except asyncio.TimeoutError:
+                    break
+            # Drop requests that have timed out while waiting.
+            batch = [(job, future) for job, future in batch
+                        if not future.done()]
+            if not batch:
+                self.idle_workers.release()
+                continue
+            task = asyncio.ensure_future(self.run_batch(batch))
+            self.batches.add(task)
+            task.add_done_callback(self.batch_done)
+
+    def batch_done(self, task):
+        self.batches.discard(task)
+        self.idle_workers.release()
+
+    async def run_batch(self, batch):
+        self.metrics['batches'] += 1
+        loop = asyncio.get_event_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, score_batch,
+                                        [job for job, future in batch])
+        except Exception as e:
+            for job, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (job, future), counts in zip(batch, results):
+            if not future.done():
+                future.set_result(counts)
+
+    async def handle_connection(self, reader, writer):
+        task = current_task()
+        self.connections[task] = writer
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(
+                                    self.read_request(reader), HEADER_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                        ConnectionError):
+                    break
+                except HTTPError as e:
+                    # Where the next request would begin is not known.
+                    self.write_response(writer, e.status, dict(error=str(e)),
+                                        False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                start = time.perf_counter()
+                try:
+                    status, result = await self.dispatch(method, target,
+                                                            headers, body)
+                except HTTPError as e:
+                    status, result = e.status, dict(error=str(e))
+                except Exception as e:
+                    self.metrics['errors'] += 1
+                    status, result = 500, dict(error=str(e))
+                if urlsplit(target).path == '/score':
+                    self.latency.add(time.perf_counter() - start)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self.write_response(writer, status, result, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            del self.connections[task]
+            writer.close()
+
+    async def read_request(self, reader):
+        """Return (method, target, headers, body), or None at end of input.
+
+        A malformed request raises HTTPError.
+        """
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, version = line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, 'Bad request line')
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HTTPError(431, 'Too many header lines')
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            raise HTTPError(400, 'Bad Content-Length')
+        if length < 0:
+            raise HTTPError(400, 'Bad Content-Length')
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(413, 'Request body too large')
+        body = await reader.readexactly(length) if length else b''
+        return method, target, headers, body
+
+    def write_response(self, writer, status, result, keep_alive):
+        body = json.dumps(result, sort_keys=True).encode('utf-8')
+        head = ['HTTP/1.1 %d %s' % (status, HTTPStatus(status).phrase),
+                'Content-Type: application/json',
+                'Content-Length: %d' % len(body),
+                'Connection: %s' % ('keep-alive' if keep_alive else 'close')]
+        if status == 503:
+            head.append('Retry-After: 1')
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+
+    async def dispatch(self, method, target, headers, body):
+        """Return (status, result dict) for a request."""
+        url = urlsplit(target)
+        if url.path == '/metrics':
+            if method != 'GET':
+                raise HTTPError(405)
+            return 200, self.get_metrics()
+        if url.path != '/score':
+            raise HTTPError(404)
+        if method != 'POST':
+            raise HTTPError(405)
+        self.metrics['requests'] += 1
+        query = parse_qs(url.query)
+        language = query.get('language', ['eng'])[-1]
+        lexicon = parse_flag(query.get('lexicon', ['0'])[-1], 'lexicon')
+        try:
+            if headers.get('content-type', '').startswith('application/json'):
+                params = json.loads(body.decode('utf-8'))
+                text = params['text']
+                language = params.get('language', language)
+                lexicon = parse_flag(params.get('lexicon', lexicon),
+                                     'lexicon')
+            else:
+                text = body.decode('utf-8')
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise HTTPError(400, 'Expected UTF-8 text or JSON object '
+                                    'with "text"')
+        if not isinstance(text, str):
+            raise HTTPError(400, '"text" must be a string')
+        if language not in measure_names:
+            raise HTTPError(400, 'language must be "eng" or "spa"')
+        counts = await self.score(text, language, lexicon)
+        self.metrics['scored'] += 1
+        self.metrics['words'] += counts[1]
+        return 200, score_result(counts, language)
+
+    def get_metrics(self):
+        metrics = dict(self.metrics)
+        metrics['pending'] = self.pending
+        metrics['latency'] = self.latency.as_dict()
+        return metrics
+
+
+def printf(format_str, *args):
+    sys.stdout.write(format_str % args)
+
+
+def usage_exit(msg=''):
+    if msg and not msg.endswith('\n'):
+        msg += '\n'
+    sys.exit('%s%s' % (msg, __doc__))
+
+
+def main():
+    try:
+        (opts, args) = getopt.gnu_getopt(sys.argv[1:], 'ha:p:j:Pb:d:q:t:')
+    except getopt.GetoptError as e:
+        usage_exit(e.msg)
+    params = {}
+    for optflag, optval in opts:
+        try:
+            if optflag == '-a':
+                params['host'] = optval
+            elif optflag == '-p':
+                params['port'] = int(optval)
+            elif optflag == '-j':
+                params['workers'] = int(optval) or None
+            elif optflag == '-P':
+                params['processes'] = True
+            elif optflag == '-b':
+                params['batch_size'] = int(optval)
+            elif optflag == '-d':
+                params['batch_delay'] = float(optval)
+            elif optflag == '-q':
+                params['max_pending'] = int(optval)
+            elif optflag == '-t':
+                params['timeout'] = float(optval)
+            else:
+                usage_exit()
+        except ValueError:
+            usage_exit('Bad value for %s: %s' % (optflag, optval))
+    if args:
+        usage_exit('No args expected.')
+    server = ScoringServer(**params)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(server.start())
+    printf('Serving on %s:%d\n', server.host, server.port)
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.close())
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#! /usr/bin/env python
+# vim: set fileencoding=utf-8
+
+# Python 2 or 3
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""syllable_cache.py -- size-bounded memo for syllable counting functions.
+
+Word frequencies in natural text are very skewed: a few thousand distinct
+words account for most of the word tokens in a document. A SyllableCache
+wraps a syllable counting function and remembers the counts of the most
+recently used words, so the regex work is done once per distinct word
+rather than once per occurrence. count_unique() does the same for a batch
+of words.
+
+The least-recently-used bookkeeping is in LRUCache, which ResultCache (in
+result_cache.py) uses too.
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+import threading
+from array import array
+from collections import namedtuple, OrderedDict
+
+
+DEFAULT_MAXSIZE = 50000
+
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses evictions maxsize currsize')
+
+
+class LRUCache(object):
+    """Mapping of up to maxsize keys to values (not None), dropping the least
+    recently used key to make room, with counts of hits, misses and
+    evictions.
+
+    The cache may be shared by threads. Keys are added and dropped under a
+    lock, but looked up without one, so the hit and miss counts may miss a
+    few lookups made at the same moment in different threads.
+    """
+
+    def __init__(self, maxsize):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1; got %r' % maxsize)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        try:
+            self._touch = self.cache.move_to_end
+        except AttributeError:      # Python 2
+            # OrderedDict is written in Python, so a change to it must not
+            # run at the same time as another.
+            def touch(key, cache=self.cache, lock=self.lock):
+                with lock:
+                    cache[key] = cache.pop(key)
+            self._touch = touch
+
+    def get(self, key):
+        """Return the value for key, or None if it is not cached."""
+        try:
+            value = self.cache[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            self._touch(key)
+        except KeyError:    # Dropped by another thread since the lookup.
+            pass
+        return value
+
+    def put(self, key, value):
+        cache = self.cache
+        with self.lock:
+            if key not in cache and len(cache) >= self.maxsize:
+                cache.popitem(last=False)
+                self.evictions += 1
+            cache[key] = value
+
+    def cache_info(self):
+        with self.lock:
+            return CacheInfo(self.hits, self.misses, self.evictions,
+                             self.maxsize, len(self.cache))
+
+    def cache_clear(self):
+        """Drop all cached values and reset the counters."""
+        with self.lock:
+            self.cache.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+class SyllableCache(LRUCache):
+    """LRU cache in front of a one-argument syllable counting function.
+
+    Call the cache object as you would the function. When the cache holds
+    maxsize words, the least recently used one is dropped to make room.
+    """
+
+    def __init__(self, func, maxsize=DEFAULT_MAXSIZE):
+        LRUCache.__init__(self, maxsize)
+        self.func = func
+
+    def __call__(self, word):
+        n = self.get(word)
+        if n is None:
+            n = self.func(word)
+            self.put(word, n)
+        return n
+
+
+def unique_words(words):
+    """Return a list of the distinct words in words, in order of first use."""
+    return list(OrderedDict.fromkeys(words))
+
+
+def broadcast_counts(words, counts):
+    """Return array('i') of counts[word] for each of words."""
+    return array(str('i'), map(counts.__getitem__, words))
+
+
+def count_unique(func, words):
+    """Return array('i') of func(word) for each of words.
+
+    func is called only once for each distinct word.
+    """
+    counts = dict((word, func(word)) for word in unique_words(words))
+    return broadcast_counts(words, counts)
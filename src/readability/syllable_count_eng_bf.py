@@ -16,13 +16,26 @@ basic version gets wrong.
 
 from __future__ import division, print_function, unicode_literals
 
+import os
+
 from . import syllable_count_eng
 from . import Bloom_filter
-from .Bloom_filter_data import undercount_filter, overcount_filter
+from .syllable_cache import unique_words, broadcast_counts
 
 
-undercount_bf = Bloom_filter.create_and_load_Bloom_filter(undercount_filter)
-overcount_bf = Bloom_filter.create_and_load_Bloom_filter(overcount_filter)
+# The filters are memory-mapped from the binary files made by
+# util/make_Bloom_filter.py if they are present, else decoded from
+# Bloom_filter_data.py.
+here = os.path.dirname(os.path.abspath(__file__))
+try:
+    undercount_bf = Bloom_filter.load_Bloom_filter(
+                            os.path.join(here, 'undercount_filter.bf'))
+    overcount_bf = Bloom_filter.load_Bloom_filter(
+                            os.path.join(here, 'overcount_filter.bf'))
+except (IOError, OSError):
+    from .Bloom_filter_data import undercount_filter, overcount_filter
+    undercount_bf = Bloom_filter.create_and_load_Bloom_filter(undercount_filter)
+    overcount_bf = Bloom_filter.create_and_load_Bloom_filter(overcount_filter)
 
 
 def syllable_count_eng_bf(word):
@@ -37,6 +50,28 @@ def syllable_count_eng_bf(word):
     return n
 
 
+def syllable_counts_eng_bf(words):
+    """Return array('i') of syllable counts for a sequence of words.
+
+    Each distinct word is counted once, and the Bloom filter tests are
+    done for all of them together.
+    """
+    unique = unique_words(words)
+    lowered = [word.lower() for word in unique]
+    counts = [syllable_count_eng.syllable_count_eng(word) for word in unique]
+    under = [word in undercount_bf for word in lowered]
+    not_under = [k for k, found in enumerate(under) if not found]
+    over = [lowered[k] in overcount_bf for k in not_under]
+    for k, found in enumerate(under):
+        if found:
+            counts[k] += 1
+    for k, found in zip(not_under, over):
+        if found:
+            counts[k] -= 1
+    return broadcast_counts(words, dict(
+            (word, max(n, 1)) for word, n in zip(unique, counts)))
+
+
 if __name__ == '__main__':
     import sys, io
     with io.open(sys.argv[1], encoding='utf8') as fp:
@@ -8,14 +8,24 @@ from __future__ import division, print_function, unicode_literals
 
 import re
 
+try:
+    unichr
+except NameError:
+    unichr = chr     # Python 3
+
+from .syllable_cache import count_unique
+
 gue_etc_re = re.compile(r'([gq])u([ei])')
 consonants_re = re.compile(
         r'(ch|ll|rr|b|c|d|f|g|j|k|l|m|n|p|q|r|s|t|v|w|x|z|\xf1|\xd1)')
 
 
-def syllable_count_spa(word):
+def syllable_count_spa_split(word):
     """Return number of syllables in a Spanish word.
 
+    This is the original version, which splits the word with a regex;
+    syllable_count_spa() gives the same results.
+
     Spanish syllables each have one or more vowels. Split the word
     on consonants. Examine the intervening vowels. Each string of
     consecutive vowels will be part of one or more syllables.
@@ -57,6 +67,57 @@ def syllable_count_spa(word):
     return n
 
 
+
+# syllable_count_spa() does the same work with str methods, which run in C.
+# The translate table maps every consonant to a space, so the vowel runs
+# are the words of str.split(). (The digraphs ch, ll, rr need no special
+# handling: they only separate vowel runs, as two consonants do.) Each
+# vowel that matters to a two-vowel run is mapped to a letter for its
+# class; since the letters used are consonants, they cannot also come from
+# the word. Whitespace in the word is a "vowel" to the split version, so it
+# is mapped to a letter too.
+STRONG, STRONG_ACCENTED, WEAK_ACCENTED, OTHER = 'b', 'c', 'd', 'f'
+spa_table = dict.fromkeys(map(ord, 'bcdfgjklmnpqrstvwxz\xf1\xd1'), ' ')
+spa_table.update(dict.fromkeys(map(ord, 'aeo'), STRONG))
+spa_table.update(dict.fromkeys(map(ord, '\xe1\xe9\xf3'), STRONG_ACCENTED))
+spa_table.update(dict.fromkeys(map(ord, '\xed\xfa'), WEAK_ACCENTED))
+spa_table.update((c, OTHER) for c in range(0x3001)
+                    if unichr(c).isspace())
+spa_table[ord('h')] = None
+
+# The two-vowel runs that are two syllables: two strong vowels (accented
+# or not), or a strong vowel and an accented weak one.
+two_syllable_pairs = frozenset(a + b for a in (STRONG, STRONG_ACCENTED)
+                                        for b in (STRONG, STRONG_ACCENTED))
+two_syllable_pairs |= frozenset([STRONG + WEAK_ACCENTED,
+                                 WEAK_ACCENTED + STRONG])
+
+
+def syllable_count_spa(word):
+    """Return number of syllables in a Spanish word.
+
+    See syllable_count_spa_split() for the rules. Each run of vowels counts
+    one syllable, and one more if it is three or more vowels or a two-vowel
+    run in two_syllable_pairs.
+    """
+    word = word.lower()
+    if 'u' in word:
+        word = word.replace('h', '')
+        if 'gu' in word or 'qu' in word:
+            word = gue_etc_re.sub(r'\1\2', word)
+    runs = word.translate(spa_table).split()
+    n = len(runs)
+    for v in runs:
+        if len(v) > 1 and (len(v) > 2 or v in two_syllable_pairs):
+            n += 1
+    return n
+
+
+def syllable_counts_spa(words):
+    """Return array('i') of syllable counts for a sequence of words."""
+    return count_unique(syllable_count_spa, words)
+
+
 if __name__ == '__main__':
     import io
     with io.open('spanish_words') as fp:
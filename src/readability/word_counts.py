@@ -0,0 +1,143 @@
+#! /usr/bin/env python
+# vim: set fileencoding=utf-8
+
+# Python 2 or 3
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""word_counts.py -- word and separator frequency counts.
+
+Readability adds the words and separators of each text it reads to the
+dwords and dseparators mappings in bulk, with count_into(). A WordCounts
+object used as dwords also sorts each distinct word into one of the
+classes rdblty.py reports (lower case, capitalized, number, URL, ...) when
+it is first counted, so reporting does not have to test every word
+against every class.
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+import heapq
+from collections import Counter
+try:
+    from itertools import filterfalse
+except ImportError:
+    from itertools import ifilterfalse as filterfalse  # Python 2
+
+
+# The word classes, in the order they are tested: a word is in the first
+# class it fits.
+WORD_CLASSES = ('lower', 'upper', 'cap', 'apostrophed', 'hyphenated', 'alpha',
+                'number', 'number+', 'URL', 'ends_dot', 'leftovers')
+
+
+def word_class(s):
+    """Return the name of the class of word s."""
+    if s.isalpha():
+        if s.islower():
+            return 'lower'
+        if s.isupper():
+            return 'upper'
+        if len(s) > 1 and s[0].isupper() and s[1:].islower():
+            return 'cap'
+    if "'" in s and s.replace("'", '', 1).isalpha():
+        return 'apostrophed'
+    if '-' in s and s.replace('-', '').isalpha():
+        return 'hyphenated'
+    if s.isalpha():
+        return 'alpha'
+    if s.isdigit():
+        return 'number'
+    if s[:1].isdigit() or (s[:1] == '.' and s[1:2].isdigit()):
+        return 'number+'
+    if s.startswith('http:') or s.startswith('https:'):
+        return 'URL'
+    if s[-1:] == '.':
+        return 'ends_dot'
+    return 'leftovers'
+
+
+def report_order(item):
+    """Sort key for (word, count): most frequent first, then by word."""
+    return -item[1], item[0].lower(), item[0]
+
+
+def count_into(counts, items):
+    """Add the number of times each of items occurs to counts[item].
+
+    counts may be a Counter (or WordCounts), which counts the items in C,
+    or a plain dict.
+    """
+    if isinstance(counts, Counter):
+        counts.update(items)
+    else:
+        get = counts.get
+        for item in items:
+            counts[item] = get(item, 0) + 1
+
+
+class WordCounts(Counter):
+    """Counter of words that knows the class of each word.
+
+    Words are classified when update() (or the constructor) first counts
+    them; words added by item assignment are classified when the classes
+    are next asked for.
+    """
+
+    def __init__(self, iterable=None, **kwds):
+        self.word_class = {}
+        Counter.__init__(self, iterable, **kwds)
+
+    def update(self, iterable=None, **kwds):
+        if isinstance(iterable, WordCounts):
+            classes = self.word_class
+            for word, cls in iterable.word_class.items():
+                classes.setdefault(word, cls)
+        elif iterable is not None and not hasattr(iterable, 'items'):
+            # Count the sequence in C, then classify the words only if some
+            # were new, which in a large corpus is seldom.
+            if not isinstance(iterable, (list, tuple)):
+                iterable = list(iterable)
+            size = len(self)
+            Counter.update(self, iterable)
+            if len(self) > size:
+                self.classify(set(iterable))
+            iterable = None
+        elif iterable is not None:
+            self.classify(iterable)
+        Counter.update(self, iterable, **kwds)
+        if kwds:
+            self.classify(kwds)
+
+    def classify(self, words):
+        classes = self.word_class
+        for word in filterfalse(classes.__contains__, words):
+            classes[word] = word_class(word)
+
+    def __reduce__(self):
+        # Keep the classes, rather than classifying the words again.
+        return type(self), (), self.__dict__, None, iter(self.items())
+
+    def buckets(self):
+        """Return a dict of class name: list of (word, count) in that class."""
+        self.classify(self)
+        classes = self.word_class
+        buckets = dict((name, []) for name in WORD_CLASSES)
+        for item in self.items():
+            buckets[classes[item[0]]].append(item)
+        return buckets
+
+    def top(self, n=None, word_class=None):
+        """Return the n most frequent (word, count) pairs, most frequent first.
+
+        Ties are in order of word, ignoring case. If word_class is given,
+        only words of that class are included. If n is None, return all.
+        """
+        if word_class is None:
+            items = self.items()
+        else:
+            items = self.buckets()[word_class]
+        if n is None:
+            return sorted(items, key=report_order)
+        return heapq.nsmallest(n, items, key=report_order)
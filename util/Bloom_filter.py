@@ -7,6 +7,8 @@ from __future__ import division, print_function, unicode_literals
 
 from zlib import adler32, crc32
 import base64
+import mmap
+import struct
 
 
 ## {{{ http://code.activestate.com/recipes/577684/ (r18)
@@ -75,9 +77,10 @@ class BloomFilter:
 
 # Multiply crc32() and adler32() "hashes" by primes chosen to reduce the number
 # of false undercount/overcount filter hits for words in the CMU dictionary,
-# and try to get those hits to be not-too-common words. This is done by trial
+# and try to get those hits to be not-too-common words. This was done by trial
 # and error, and needs to be redone if syllable_count_eng.py or the syllable
-# dictionary (or the Bloom filter config) is changed.
+# dictionary (or the Bloom filter config) is changed; make_Bloom_filter.py -t
+# now searches for the best primes, bins, and probes for each filter.
 # False undercount hits (6): algy ardella gourlay leamon petterson pseudonym
 # False overcount hits (10): cama car damsel evaded macromedia quintela
 #                                       semolina spohr wayne winokur
@@ -86,32 +89,93 @@ PRIME1 = 13
 PRIME2 = 11
 
 
+# Bit i of the filter is bit_masks[i % 8] in byte i // 8.
+bit_masks = tuple(2 ** k for k in range(8))
+
+
+# Binary filter file format (all integers little-endian):
+#   header: 8-byte magic b'RGBLOOMF', then uint32 version, number of bins,
+#           number of probes, prime1, prime2, crc32 of the bit array
+#   bit array: (number of bins + 7) // 8 bytes
+# The file is memory-mapped by load_Bloom_filter(), so forked processes
+# share one copy of the bit array in the OS page cache.
+FILTER_MAGIC = b'RGBLOOMF'
+FILTER_VERSION = 1
+filter_header_struct = struct.Struct(str('<8s6I'))
+
+
 class BloomFilter2(BloomFilter):
-    def __init__(self, num_bins, num_probes, iterable=()):
+    def __init__(self, num_bins, num_probes, iterable=(),
+                    prime1=PRIME1, prime2=PRIME2):
         num_bytes = (num_bins + 7) // 8
         self.array = bytearray(num_bytes)
         self.num_probes = num_probes
         self.num_bins = num_bins
+        self.prime1 = prime1
+        self.prime2 = prime2
         self.update(iterable)
 
     def get_probes(self, key):
         # FIXME TEMP for test/dev
         assert isinstance(key, unicode if str is bytes else str)
         key = key.encode('utf8')
-        h = ((crc32(key) & 0xffffffff) * PRIME1) % self.num_bins
+        h = ((crc32(key) & 0xffffffff) * self.prime1) % self.num_bins
         # For use only with twin prime num_bins:
         # h2 = (adler32(key) & 0xffffffff) % (self.num_bins - 2) + 2
-        h2 = ((adler32(key) & 0xffffffff) * PRIME2) % self.num_bins
+        h2 = ((adler32(key) & 0xffffffff) * self.prime2) % self.num_bins
         for _ in range(self.num_probes):
             yield h
             h -= h2
             if h < 0:
                 h += self.num_bins
 
+    # update() and __contains__() compute the same probes as get_probes(),
+    # but inline, without the generator, and __contains__() stops at the
+    # first probe that finds its bit clear (for most keys not in the
+    # filter, the first or second probe).
+
+    def update(self, keys):
+        array, num_bins = self.array, self.num_bins
+        prime1, prime2 = self.prime1, self.prime2
+        for key in keys:
+            key = key.encode('utf8')
+            h = ((crc32(key) & 0xffffffff) * prime1) % num_bins
+            h2 = ((adler32(key) & 0xffffffff) * prime2) % num_bins
+            for _ in range(self.num_probes):
+                array[h >> 3] |= bit_masks[h & 7]
+                h -= h2
+                if h < 0:
+                    h += num_bins
+
+    def __contains__(self, key):
+        key = key.encode('utf8')
+        array, num_bins = self.array, self.num_bins
+        h = ((crc32(key) & 0xffffffff) * self.prime1) % num_bins
+        h2 = ((adler32(key) & 0xffffffff) * self.prime2) % num_bins
+        for _ in range(self.num_probes):
+            if not array[h >> 3] & bit_masks[h & 7]:
+                return False
+            h -= h2
+            if h < 0:
+                h += num_bins
+        return True
+
     def dump_filter(self, fp, filter_name):
-        fp.write(b'\n%s = (%d, %d, """\\\n%s""")\n' %
+        # The multiplier primes are only written if they are not the
+        # defaults, so filters made with the defaults are written as before.
+        primes = b''
+        if (self.prime1, self.prime2) != (PRIME1, PRIME2):
+            primes = b', %d, %d' % (self.prime1, self.prime2)
+        fp.write(b'\n%s = (%d, %d, """\\\n%s"""%s)\n' %
                 (filter_name.encode('ascii'), self.num_bins, self.num_probes,
-                base64.b64encode(self.array)))
+                base64.b64encode(self.array), primes))
+
+    def dump_filter_binary(self, fp):
+        """Write the filter to binary file fp in the format described above."""
+        fp.write(filter_header_struct.pack(FILTER_MAGIC, FILTER_VERSION,
+                self.num_bins, self.num_probes, self.prime1, self.prime2,
+                crc32(bytes(self.array)) & 0xffffffff))
+        fp.write(self.array)
 
     def print_filter_stats(self, filter_name):
         num_bins_set = ''.join(format(x, '08b') for x in self.array).count('1')
@@ -122,6 +186,36 @@ class BloomFilter2(BloomFilter):
 
 
 def create_and_load_Bloom_filter(filtr):
-    bf = BloomFilter2(filtr[0], filtr[1])
+    """Return a BloomFilter2 from a tuple written by dump_filter().
+
+    filtr is (num_bins, num_probes, base64 bit array), optionally followed
+    by prime1 and prime2.
+    """
+    bf = BloomFilter2(filtr[0], filtr[1], (), *filtr[3:5])
     bf.array = bytearray(base64.b64decode(filtr[2]))
     return bf
+
+
+def load_Bloom_filter(fn):
+    """Return a BloomFilter2 memory-mapped from binary filter file fn."""
+    with open(fn, 'rb') as fp:
+        data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    (magic, version, num_bins, num_probes, prime1, prime2,
+            checksum) = filter_header_struct.unpack_from(data, 0)
+    if magic != FILTER_MAGIC or version != FILTER_VERSION:
+        raise ValueError('%s is not a version %d Bloom filter file' %
+                            (fn, FILTER_VERSION))
+    bf = BloomFilter2(num_bins, 0, prime1=prime1, prime2=prime2)
+    bf.num_probes = num_probes
+    if len(data) != filter_header_struct.size + len(bf.array):
+        raise ValueError('%s: Bloom filter file is truncated' % fn)
+    if str is bytes:
+        # Python 2: indexing an mmap or memoryview gives a str, not an int,
+        # and crc32() does not take a bytearray.
+        array = data[filter_header_struct.size:]
+        bf.array = bytearray(array)
+    else:
+        array = bf.array = memoryview(data)[filter_header_struct.size:]
+    if crc32(array) & 0xffffffff != checksum:
+        raise ValueError('%s: Bloom filter checksum does not match' % fn)
+    return bf
@@ -1,4 +1,5 @@
 setlocal
 set syll_cnt_fn=cmudict_dev.json
 set bf_fn=Bloom_filter_data.py
-py -3 make_Bloom_filter.py %syll_cnt_fn% %bf_fn%  > outf
+set bin_dir=.
+py -3 make_Bloom_filter.py %syll_cnt_fn% %bf_fn% %bin_dir%  > outf
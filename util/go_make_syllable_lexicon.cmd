@@ -0,0 +1 @@
+py -3 make_syllable_lexicon.py cmudict_dev.json ..\src\readability\syllable_lexicon.dat
@@ -8,19 +8,42 @@
 
 """make_Bloom_filter.py - make Bloom filter data file from dict data.
 
-Usage: make_Bloom_filter.py syllable_counts.json Bloom_filter_data.py
+Usage: make_Bloom_filter.py [-t] [-j jobs] [-p max_prime]
+            syllable_counts.json Bloom_filter_data.py [bin_dir]
+  Where
+      -t            search for the best filter parameters
+      -j jobs       number of worker processes (default 1; 0 means one
+                      per CPU)
+      -p max_prime  largest multiplier prime tried by -t (default 31)
 
 The syllable_counts.json file must be created from the CMU pronouncing
 dictionary with make_cmudict_syllables.py.
+
+If bin_dir is given, also write the filters in binary form, as files
+undercount_filter.bf and overcount_filter.bf in bin_dir, to be
+memory-mapped by Bloom_filter.load_Bloom_filter().
+
+Without -t, the filters use Bloom_filter.PRIME1 and PRIME2, and bins and
+probes from Bloom_filter_config for FALSE_POSITIVE_PROBABILITY. With -t,
+each filter is built with every pair of multiplier primes up to max_prime,
+every bin count in TUNE_BIN_SCALES (times the configured one), and every
+probe count in TUNE_PROBE_DELTAS (plus the configured one). The filter with
+the fewest false hits (dictionary words that are not keys but are found in
+the filter) is written; ties go to the smaller filter. The search is spread
+over the -j worker processes.
 """
 
 from __future__ import division, print_function, unicode_literals
 
 
 import sys
+import os
 import json
 import random
 import string
+import getopt
+import multiprocessing
+from zlib import adler32, crc32
 
 import syllable_count_eng
 import Bloom_filter
@@ -35,29 +58,41 @@ BLOOM_FILTER_TEST = False
 SAMPLE_TEST = True
 SAMPLE_TEST = False
 
+# The parameter search (-t) tries these bin counts, as multiples of the
+# configured count (each rounded up to a prime), and these numbers of probes
+# more or less than the configured number.
+TUNE_BIN_SCALES = (0.9, 1.0, 1.1)
+TUNE_PROBE_DELTAS = (-1, 0, 1)
+TUNE_MAX_PRIME = 31
+
 
 def printf(format_str, *args):
     sys.stdout.write(format_str % args)
 
 
-def test(cmudict, syllable_count_function):
+def test(cmudict, syllable_count_function, pool=None):
     """Check count from syllable_count_function against CMU dict count.
 
     For each word in CMU dict, get count from function. Track errors
     and return word count, total error count, net error count,
-    and a dictionary of words keyed by error count.
+    and a dictionary of words keyed by error count. If pool is given,
+    the words are counted in its worker processes.
     """
     errcnt = 0
     neterr = 0
     nwords = 0
     errs = {}
-    for word in sorted(cmudict.keys()):
+    words = sorted(cmudict.keys())
+    if pool is None:
+        my_counts = map(syllable_count_function, words)
+    else:
+        my_counts = pool.map(syllable_count_function, words, 1000)
+    for word, my_count in zip(words, my_counts):
         # The JSON file has the keys forced lowercase.
         assert isinstance(word, unicode if str is bytes else str)
         nwords += 1
         syll_counts = cmudict[word]
         err = 0
-        my_count = syllable_count_function(word)
         # Detect if my count is outside range of CMU counts.
         if my_count not in syll_counts:
             if my_count < syll_counts[0]:
@@ -81,16 +116,112 @@ def test(cmudict, syllable_count_function):
     return nwords, errcnt, neterr, errs
 
 
-def create_write_Bloom_filter_data(fp, filter_name, prob, words):
-    nbins, nprobes = Bloom_filter_config.num_bins_and_probes_for_false_pos_prob(
-            len(words), prob)
+def create_write_Bloom_filter_data(fp, filter_name, params, words,
+                                    binary_dir=None):
+    nbins, nprobes, prime1, prime2 = params
     # print(type(words), len(words), type(sorted(words)[0]))
-    bf = Bloom_filter.BloomFilter2(nbins, nprobes, words)
+    bf = Bloom_filter.BloomFilter2(nbins, nprobes, words, prime1, prime2)
     assert all(wd in bf for wd in words)
     bf.dump_filter(fp, filter_name)
+    if binary_dir is not None:
+        binary_fn = os.path.join(binary_dir, filter_name + '.bf')
+        with open(binary_fn, 'wb') as bfp:
+            bf.dump_filter_binary(bfp)
+        assert all(wd in Bloom_filter.load_Bloom_filter(binary_fn)
+                    for wd in words)
     return bf
 
 
+# Parameter search. The crc32() and adler32() of every word are computed
+# once; each task then takes one (prime1, number of bins) pair, so the
+# first probe of every word is computed once for all the prime2 values and
+# probe counts it tries. The probes are those of BloomFilter2.
+
+tune_keys = None
+tune_others = None
+
+
+def word_hashes(words):
+    hashes = []
+    for word in words:
+        word = word.encode('utf8')
+        hashes.append((crc32(word) & 0xffffffff, adler32(word) & 0xffffffff))
+    return hashes
+
+
+def init_tune_worker(keys, others):
+    global tune_keys, tune_others
+    tune_keys, tune_others = keys, others
+
+
+def tune_task(task):
+    """Return (false hits, bins, probes, prime1, prime2) for each filter."""
+    prime1, num_bins, primes, probe_counts = task
+    bit_masks = Bloom_filter.bit_masks
+    keys = [((c * prime1) % num_bins, a) for c, a in tune_keys]
+    others = [((c * prime1) % num_bins, a) for c, a in tune_others]
+    results = []
+    for prime2 in primes:
+        for num_probes in probe_counts:
+            array = bytearray((num_bins + 7) // 8)
+            for h, a in keys:
+                h2 = (a * prime2) % num_bins
+                for _ in range(num_probes):
+                    array[h >> 3] |= bit_masks[h & 7]
+                    h -= h2
+                    if h < 0:
+                        h += num_bins
+            false_hits = 0
+            for h, a in others:
+                if not array[h >> 3] & bit_masks[h & 7]:
+                    continue
+                h2 = (a * prime2) % num_bins
+                for _ in range(num_probes - 1):
+                    h -= h2
+                    if h < 0:
+                        h += num_bins
+                    if not array[h >> 3] & bit_masks[h & 7]:
+                        break
+                else:
+                    false_hits += 1
+            results.append((false_hits, num_bins, num_probes, prime1, prime2))
+    return results
+
+
+def tune_filter(filter_name, keys, others, prob, jobs, max_prime):
+    """Return (false hits, bins, probes, prime1, prime2) of the best filter.
+
+    others are the words that should not be found in the filter.
+    """
+    nbins, nprobes = Bloom_filter_config.num_bins_and_probes_for_false_pos_prob(
+            len(keys), prob)
+    primes = [n for n in range(3, max_prime + 1)
+                if Bloom_filter_config.isprime(n)]
+    bin_counts = sorted(set(Bloom_filter_config.nextprime(int(nbins * scale))
+                            for scale in TUNE_BIN_SCALES))
+    probe_counts = [nprobes + d for d in TUNE_PROBE_DELTAS if nprobes + d > 0]
+    tasks = [(prime1, num_bins, primes, probe_counts)
+                for num_bins in bin_counts for prime1 in primes]
+    args = (word_hashes(keys), word_hashes(others))
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs, init_tune_worker, args)
+        try:
+            results = pool.map(tune_task, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        init_tune_worker(*args)
+        results = map(tune_task, tasks)
+    results = [r for task_results in results for r in task_results]
+    best = min(results)
+    printf('%s: tried %d filters; best: %d false hits with %d bins, '
+            '%d probes, primes %d and %d\n',
+            filter_name, len(results), best[0], best[1], best[2],
+            best[3], best[4])
+    return best
+
+
 def make_syl_count_bf(under_bf, over_bf):
     """Return a syllable count function using Bloom filters."""
     def syl_count_bf(word):
@@ -157,23 +288,53 @@ def check_cmudict_for_under_over_counts(cmudict, under_bf, over_bf):
     # printf('False undercount hits: %d  False overcount hits: %d\n', false_under_cnt, len(false_overs))
 
 
-def make_bf(cmudict_fn, filter_data_fn):
+def filter_params(filter_name, keys, others, optns):
+    """Return (bins, probes, prime1, prime2) for a filter of keys."""
+    prob = FALSE_POSITIVE_PROBABILITY
+    if not optns.tune:
+        nbins, nprobes = Bloom_filter_config.num_bins_and_probes_for_false_pos_prob(
+                len(keys), prob)
+        return nbins, nprobes, Bloom_filter.PRIME1, Bloom_filter.PRIME2
+    best = tune_filter(filter_name, keys, others, prob, optns.jobs,
+                        optns.max_prime)
+    return best[1:]
+
+
+def make_bf(cmudict_fn, filter_data_fn, binary_dir=None, optns=None):
     with open(cmudict_fn) as f:
         cmudict = json.load(f)
-    nwords, errcnt, neterr, errs = test(cmudict, syllable_count_eng.syllable_count_eng)
+    pool = None
+    if optns.jobs > 1:
+        pool = multiprocessing.Pool(optns.jobs)
+    try:
+        nwords, errcnt, neterr, errs = test(cmudict,
+                                syllable_count_eng.syllable_count_eng, pool)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
     printf('Syllable count errors without Bloom filter:\n')
     printf('%s\n', sorted((k, len(errs[k])) for k in errs))
     printf('%d errors in %d words (%.3f%%); net errors: %d (%.3f%%)\n',
         errcnt, nwords, 100.0 * errcnt / nwords, neterr, abs(100.0 * neterr / nwords))
-    prob = FALSE_POSITIVE_PROBABILITY
+    # A word in the undercount filter is not looked up in the overcount
+    # filter, so the overcount filter is only scored on the words that
+    # the undercount filter does not find.
+    under_params = filter_params('undercount_filter', errs[-1],
+                        [wd for wd in cmudict if wd not in errs[-1]], optns)
+    under_bf = Bloom_filter.BloomFilter2(*(under_params[:2] + (errs[-1],) +
+                                            under_params[2:]))
+    over_params = filter_params('overcount_filter', errs[1],
+                        [wd for wd in cmudict if wd not in errs[1]
+                            and wd not in under_bf], optns)
     with open(filter_data_fn, 'wb') as fp:
         fp.write(b'#! /usr/bin/env python\n# vim: set fileencoding=utf-8\n\n')
         fp.write(b'# Python 2 or 3\n\n')
         fp.write(b'## Bloom filter data -- generated by Bloom_filter.py\n')
         under_bf = create_write_Bloom_filter_data(fp, 'undercount_filter',
-                                                    prob, errs[-1])
+                                        under_params, errs[-1], binary_dir)
         over_bf = create_write_Bloom_filter_data(fp, 'overcount_filter',
-                                                    prob, errs[1])
+                                        over_params, errs[1], binary_dir)
 
     printf('Bloom filter stats:\n')
     under_bf.print_filter_stats('undercount_filter')
@@ -217,11 +378,38 @@ def usage_exit(msg=""):
 
 
 def main():
-    args = sys.argv[1:]
-    if len(args) != 2:
-        usage_exit('Need exactly 2 args.')
-    cmudict_fn, filter_data_fn = args
-    make_bf(cmudict_fn, filter_data_fn)
+    try:
+        (opts, args) = getopt.gnu_getopt(sys.argv[1:], 'htj:p:')
+    except getopt.GetoptError as e:
+        usage_exit(e.msg)
+    optns = type(str('optns'), (), {})()
+    optns.tune = False
+    optns.jobs = 1
+    optns.max_prime = TUNE_MAX_PRIME
+    for optflag, optval in opts:
+        if optflag == '-h':
+            usage_exit()
+        elif optflag == '-t':
+            optns.tune = True
+        elif optflag == '-j':
+            try:
+                optns.jobs = int(optval)
+            except ValueError:
+                optns.jobs = -1
+            if optns.jobs < 0:
+                usage_exit('-j needs a number of jobs.')
+            if optns.jobs == 0:
+                optns.jobs = multiprocessing.cpu_count()
+        elif optflag == '-p':
+            try:
+                optns.max_prime = int(optval)
+            except ValueError:
+                optns.max_prime = 0
+            if optns.max_prime < 3:
+                usage_exit('-p needs a number of at least 3.')
+    if len(args) not in (2, 3):
+        usage_exit('Need 2 or 3 args.')
+    make_bf(*args, optns=optns)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,112 @@
+#! /usr/bin/env python
+# vim: set fileencoding=utf-8
+
+# Python 2 or 3
+
+## Copyright © 2018 Raymond D. Gardner
+## Licensed under the MIT License
+
+"""make_syllable_lexicon.py - make exact syllable count lexicon from dict data.
+
+Usage: make_syllable_lexicon.py syllable_counts.json syllable_lexicon.dat
+
+The syllable_counts.json file must be created from the CMU pronouncing
+dictionary with make_cmudict_syllables.py. The output file is read by
+syllable_lexicon.py; see there for the file format.
+
+Where CMU dict gives more than one count for a word, we store the count
+the Bloom filter syllable counter gets if that is one of them, otherwise
+the lowest. So the lexicon only changes counts that are wrong.
+"""
+
+from __future__ import division, print_function, unicode_literals
+
+
+import sys
+import json
+import struct
+from zlib import crc32
+
+from syllable_count_eng_bf import syllable_count_eng_bf
+
+
+LEXICON_MAGIC = b'RGSYLLEX'
+LEXICON_VERSION = 1
+header_struct = struct.Struct(str('<8s4I'))
+slot_struct = struct.Struct(str('<I'))
+entry_struct = struct.Struct(str('<2B'))
+
+# Slots per word is at least this; keeps the probe sequences short.
+MIN_SLOTS_PER_WORD = 2
+
+
+def printf(format_str, *args):
+    sys.stdout.write(format_str % args)
+
+
+def choose_counts(cmudict):
+    counts = {}
+    nchanged = 0
+    for word, syll_counts in cmudict.items():
+        n = syllable_count_eng_bf(word)
+        if n not in syll_counts:
+            n = syll_counts[0]
+            nchanged += 1
+        counts[word] = n
+    return counts, nchanged
+
+
+def write_lexicon(fp, counts):
+    num_slots = 1
+    while num_slots < MIN_SLOTS_PER_WORD * len(counts):
+        num_slots *= 2
+    mask = num_slots - 1
+    slots = [0] * num_slots
+    entries = bytearray()
+    max_probes = 0
+    # Sorted, so the file is the same in Python 2 and 3.
+    for word in sorted(counts):
+        key = word.encode('ascii')
+        assert len(key) < 256 and 0 < counts[word] < 256
+        k = (crc32(key) & 0xffffffff) & mask
+        nprobes = 1
+        while slots[k]:
+            k = (k + 1) & mask
+            nprobes += 1
+        max_probes = max(max_probes, nprobes)
+        slots[k] = len(entries) + 1
+        entries += entry_struct.pack(counts[word], len(key)) + key
+    fp.write(header_struct.pack(LEXICON_MAGIC, LEXICON_VERSION, len(counts),
+                                num_slots, len(entries)))
+    fp.write(struct.pack(str('<%dI' % num_slots), *slots))
+    fp.write(bytes(entries))
+    return num_slots, len(entries), max_probes
+
+
+def make_lexicon(cmudict_fn, lexicon_fn):
+    with open(cmudict_fn) as f:
+        cmudict = json.load(f)
+    counts, nchanged = choose_counts(cmudict)
+    with open(lexicon_fn, 'wb') as fp:
+        num_slots, entries_size, max_probes = write_lexicon(fp, counts)
+    printf('%d words (%d differ from Bloom filter counter); '
+            '%d slots; %d bytes of entries; longest probe sequence: %d\n',
+            len(counts), nchanged, num_slots, entries_size, max_probes)
+
+
+def usage_exit(msg=""):
+    if msg and not msg.endswith("\n"):
+        msg += "\n"
+    sys.exit("%s%s" % (msg, __doc__))
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) != 2:
+        usage_exit('Need exactly 2 args.')
+    cmudict_fn, lexicon_fn = args
+    make_lexicon(cmudict_fn, lexicon_fn)
+
+
+if __name__ == '__main__':
+    main()
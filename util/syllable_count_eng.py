@@ -17,6 +17,11 @@ from __future__ import division, print_function, unicode_literals
 
 import re
 
+try:
+    from re import _parser as sre_parse     # Python 3.11 and later
+except ImportError:
+    import sre_parse
+
 
 ##  All CMU dict words
 ##  [(-5, 1), (-4, 6), (-3, 28), (-2, 289), (-1, 6822), (0, 114146), (1, 4520), (2, 54)]
@@ -64,8 +69,12 @@ trailing_e_re = re.compile(r'e$')
 vowels_re = re.compile(r'([aeiouy]+)')
 
 
-def syllable_count_eng(word):
-    # assert isinstance(word, unicode if str is bytes else str)
+def syllable_count_eng_rules(word):
+    """Count syllables by trying each rule regex in turn.
+
+    This is the reference version of syllable_count_eng(); both must give
+    the same count for every word.
+    """
     w = word.lower().replace("'", '')
     w = trailing_e_re.sub('', w)
     n = len(vowels_re.split(w)) // 2
@@ -80,6 +89,87 @@ def syllable_count_eng(word):
     return n
 
 
+# Running 14 searches over every word is most of the cost of counting, so
+# the rule table is compiled into a matcher that needs fewer passes:
+#   - A rule anchored at the end of the word, with a match no longer than
+#     suffix_len, depends only on the last suffix_len letters. The net
+#     adjustment of all such rules is memoized per word ending.
+#   - Likewise for rules anchored at the start of the word.
+#   - The remaining rules are joined into one alternation. Few words match
+#     it at all; only those are tried against each of these rules.
+
+def _max_width(rx):
+    return sre_parse.parse(rx.pattern).getwidth()[1]
+
+
+def _compile_rule_table(decr, incr, max_width=8):
+    suffix_rules, prefix_rules, infix_rules = [], [], []
+    for rules, adj in ((decr, -1), (incr, 1)):
+        for rx in rules:
+            p = rx.pattern
+            short = _max_width(rx) <= max_width
+            if short and p.endswith('$') and not p.startswith('^'):
+                suffix_rules.append((rx, adj))
+            elif short and p.startswith('^') and not p.endswith('$'):
+                prefix_rules.append((rx, adj))
+            else:
+                infix_rules.append((rx, adj))
+    suffix_len = max([_max_width(rx) for rx, adj in suffix_rules] + [1])
+    prefix_len = max([_max_width(rx) for rx, adj in prefix_rules] + [1])
+    infix_re = None
+    if infix_rules:
+        infix_re = re.compile('|'.join('(?:%s)' % rx.pattern
+                                        for rx, adj in infix_rules))
+    return (suffix_rules, suffix_len, prefix_rules, prefix_len,
+            infix_rules, infix_re)
+
+
+(suffix_rules, suffix_len, prefix_rules, prefix_len, infix_rules,
+        infix_re) = _compile_rule_table(decr_syl_cntr, incr_syl_cntr)
+infix_search = infix_re.search if infix_re else (lambda w: None)
+
+# Net adjustment memos, keyed by word ending / beginning.
+suffix_adjustments = {}
+prefix_adjustments = {}
+MAX_ADJUSTMENTS = 100000
+
+
+def _adjustment(memo, rules, key):
+    if len(memo) >= MAX_ADJUSTMENTS:
+        memo.clear()
+    adj = 0
+    for rx, a in rules:
+        if rx.search(key):
+            adj += a
+    memo[key] = adj
+    return adj
+
+
+def syllable_count_eng(word):
+    # assert isinstance(word, unicode if str is bytes else str)
+    w = word.lower().replace("'", '')
+    if w.endswith('e'):
+        w = w[:-1]
+    n = len(vowels_re.split(w)) // 2
+    key = w[-suffix_len:]
+    try:
+        n += suffix_adjustments[key]
+    except KeyError:
+        n += _adjustment(suffix_adjustments, suffix_rules, key)
+    key = w[:prefix_len]
+    try:
+        n += prefix_adjustments[key]
+    except KeyError:
+        n += _adjustment(prefix_adjustments, prefix_rules, key)
+    if infix_search(w):
+        for rx, adj in infix_rules:
+            if rx.search(w):
+                n += adj
+    if n <= 0:
+        n = 1
+    return n
+
+
 if __name__ == '__main__':
     import sys, io
     with io.open(sys.argv[1], encoding='utf8') as fp: